@@ -1,4 +1,5 @@
 import streamlit as st
+from layout.backtest_page import render_backtest_matrix
 from layout.optimal_dispatch_page import render_optimal_dispatch
 from layout.plant_caracteristics_page import (
     render_costs,
@@ -9,6 +10,8 @@ from layout.plant_caracteristics_page import (
 from layout.ramps_page import render_cold_ramp, render_hot_ramp, render_warm_ramp
 from layout.readme_page import render_readme
 from layout.summary_page import render_summary
+from layout.sweep_page import render_parameter_sweep
+from utils.price_store import ingest_price_updates, start_price_watcher
 
 # Default values
 emission_factor_default = 0.18
@@ -29,6 +32,8 @@ ramp_hours_cold_default = 4
 
 min_hours_on_default = 4
 min_hours_off_default = 4
+max_starts_per_day_default = 100
+load_levels_default = 2
 startup_cost_default = 2500.0
 variable_cost_default = 0.5
 hourly_fixed_cost_default = 250.0
@@ -62,6 +67,9 @@ efficiency_hour_4_cold_default = 48.0
 defaults = {
     "min_hours_on": min_hours_on_default,
     "min_hours_off": min_hours_off_default,
+    "max_starts_per_day": max_starts_per_day_default,
+    "load_levels": load_levels_default,
+    "heat_rate_points": [],
     "startup_cost": startup_cost_default,
     "variable_cost": variable_cost_default,
     "hourly_fixed_cost": hourly_fixed_cost_default,
@@ -106,9 +114,19 @@ for key, value in defaults.items():
     if key not in st.session_state:
         st.session_state[key] = value
 
+# New prices dropped in data/ are ingested in the background
+start_price_watcher("data/unified_energy_dataset.csv")
+
 
 # Sidebar for page selection
 st.sidebar.title("Navigation")
+if st.sidebar.button("Reload price data"):
+    # Without waiting for the next poll of the watcher
+    try:
+        _, changed = ingest_price_updates("data/unified_energy_dataset.csv")
+        st.sidebar.success(f"{len(changed)} month(s) of prices updated")
+    except (OSError, ValueError, KeyError) as error:
+        st.sidebar.error(f"Could not load the price data: {error}")
 page = st.sidebar.radio(
     "Go to",
     [
@@ -117,6 +135,8 @@ page = st.sidebar.radio(
         "Ramp Specifications",
         "Summary",
         "Optimal Dispatch",
+        "Parameter Sweep",
+        "Backtest Matrix",
     ],
 )
 if page == "Read me":
@@ -170,3 +190,11 @@ elif page == "Summary":
 elif page == "Optimal Dispatch":
 
     render_optimal_dispatch(defaults, initial_state="OFF_20")
+
+elif page == "Parameter Sweep":
+
+    render_parameter_sweep(defaults)
+
+elif page == "Backtest Matrix":
+
+    render_backtest_matrix(defaults)
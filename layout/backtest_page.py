@@ -0,0 +1,132 @@
+import pandas as pd
+import streamlit as st
+from utils.backtest import available_combinations, run_backtest_matrix
+from utils.dataframes import price_dataset_options
+from utils.plant_cache import get_plant_model
+from utils.price_store import partition_revisions, price_store_metadata
+from utils.sweep import daily_start_limit
+
+CSV_PATH = "data/unified_energy_dataset.csv"
+
+
+def render_backtest_matrix(defaults):
+
+    st.title("Backtest Matrix")
+
+    st.info(
+        "Use this page to run the optimal dispatch of the plant for every country, gas "
+        "trading point and month available in the dataset, then drill down into a cell."
+    )
+
+    initial_state = st.text_input("Initial state", value="OFF_20")
+
+    if st.button("Run Backtest Matrix"):
+
+        emission_factor = st.session_state.get(
+            "emission_factor", defaults["emission_factor"]
+        )
+
+        model = get_plant_model(defaults)
+        graph = model.graph
+        max_starts = daily_start_limit(model.constraints_df)
+
+        with st.spinner("Solving every cell..."):
+            try:
+                revisions = partition_revisions(price_store_metadata(CSV_PATH))
+                summary, paths, price_dfs = run_backtest_matrix(
+                    graph,
+                    CSV_PATH,
+                    initial_state,
+                    emission_factor,
+                    max_starts_per_day=max_starts,
+                )
+            except (OSError, ValueError, KeyError) as error:
+                st.error(f"The backtest could not be run: {error}")
+                st.stop()
+
+        st.session_state["backtest_matrix"] = {
+            "graph": graph,
+            "start_state": initial_state,
+            "ef": emission_factor,
+            "max_starts_per_day": max_starts,
+            "revisions": revisions,
+            "summary": summary,
+            "paths": paths,
+            "price_dfs": price_dfs,
+        }
+
+    if "backtest_matrix" not in st.session_state:
+        st.info("Press the button above to run the backtest matrix.")
+        return
+
+    matrix = st.session_state["backtest_matrix"]
+
+    # Months whose prices changed (or were added) since the matrix was solved
+    try:
+        revisions = partition_revisions(price_store_metadata(CSV_PATH))
+        options = price_dataset_options(CSV_PATH)
+    except (OSError, ValueError, KeyError) as error:
+        st.error(f"The price data could not be read: {error}")
+        return
+    changed = [
+        cell
+        for cell in available_combinations(options)
+        if revisions[cell[2:]] != matrix["revisions"].get(cell[2:])
+    ]
+    if changed:
+        months = sorted({cell[2:] for cell in changed})
+        st.warning(
+            "New prices were ingested for "
+            + ", ".join(f"{month:02d}-{year}" for year, month in months)
+            + f" since the backtest was run: {len(changed)} cells are out of date."
+        )
+        if st.button("Update changed cells"):
+            with st.spinner(f"Solving {len(changed)} cells..."):
+                summary, paths, price_dfs = run_backtest_matrix(
+                    matrix["graph"],
+                    CSV_PATH,
+                    matrix["start_state"],
+                    matrix["ef"],
+                    cells=changed,
+                    max_starts_per_day=matrix["max_starts_per_day"],
+                )
+            matrix["summary"] = pd.concat(
+                [matrix["summary"].drop(changed, errors="ignore"), summary]
+            ).sort_index()
+            matrix["paths"] = {**matrix["paths"], **paths}
+            matrix["price_dfs"] = {**matrix["price_dfs"], **price_dfs}
+            matrix["revisions"] = revisions
+            st.rerun()
+
+    graph = matrix["graph"]
+    summary, paths, price_dfs = matrix["summary"], matrix["paths"], matrix["price_dfs"]
+
+    st.subheader("Net revenue grid (€)")
+    st.dataframe(
+        summary.reset_index().pivot_table(
+            index=["country", "trading_point"],
+            columns=["year", "month"],
+            values="net_revenue",
+        )
+    )
+
+    st.subheader("All cells")
+    st.dataframe(summary)
+
+    st.subheader("Drill-down")
+    cell = st.selectbox(
+        "Cell",
+        options=list(paths),
+        format_func=lambda cell: f"{cell[0]} / {cell[1]} / {cell[3]:02d}-{cell[2]}",
+    )
+
+    if paths[cell] is None:
+        st.error(f"This cell could not be solved: {summary.loc[cell, 'status']}")
+        return
+
+    cell_df = price_dfs[cell].copy()
+    cell_df["Path"] = graph.labels[paths[cell]]
+    cell_df["load"] = graph.load[paths[cell]]
+
+    st.line_chart(cell_df.set_index("Datetime")[["load", "power_price"]])
+    st.dataframe(cell_df)
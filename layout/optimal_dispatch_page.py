@@ -1,14 +1,11 @@
+import pandas as pd
 import streamlit as st
-from utils.dataframes import (
-    build_constraints_df,
-    build_efficiency_df,
-    build_power_df,
-    build_state_df,
-    load_price_df,
-)
-from utils.optimization import bellman_optimization
+from utils.dataframes import load_price_range_df, price_dataset_options
+from utils.daily_starts import solve_with_max_starts
+from utils.plant_cache import get_plant_model
 from utils.plots import plot_dispatch_chart
-from utils.transition import create_list_states
+from utils.results import PERIODS, aggregate_results, dispatch_kpis, dispatch_results
+from utils.validation import check_state_graph
 
 
 def render_optimal_dispatch(defaults, initial_state):
@@ -20,32 +17,52 @@ def render_optimal_dispatch(defaults, initial_state):
 
     col1, col2, col3, col4 = st.columns(4)
 
+    # Options come from the price store metadata, no price is loaded here
+    try:
+        options = price_dataset_options("data/unified_energy_dataset.csv")
+    except (OSError, ValueError, KeyError) as error:
+        st.error(f"The price data could not be read: {error}")
+        return
+    first_date = options["start"].date()
+    last_date = options["end"].date()
+
     with col1:
-        country = st.selectbox("Country", options=["Belgium", "France"], index=0)
+        country = st.selectbox("Country", options=options["countries"], index=0)
 
     with col2:
         trading_point = st.selectbox(
-            "Gas Trading Point", options=["ZTP", "PEG"], index=0
+            "Gas Trading Point", options=options["trading_points"], index=0
         )
 
+    # The latest month of the dataset by default, any range can be solved
     with col3:
-        month_label = st.selectbox("Month", options=["April", "May", "June"], index=1)
+        start_date = st.date_input(
+            "Start date",
+            value=max(first_date, last_date.replace(day=1)),
+            min_value=first_date,
+            max_value=last_date,
+        )
 
     with col4:
-        year = st.selectbox("Year", options=[2025], index=0)
+        end_date = st.date_input(
+            "End date", value=last_date, min_value=first_date, max_value=last_date
+        )
 
-    # Map month label to numerical value
-    month_map = {"April": 4, "May": 5, "June": 6}
-    month = month_map[month_label]
+    if end_date < start_date:
+        st.error("The end date must not be before the start date.")
+        st.stop()
 
     st.markdown(
-        f"**Selected Period**: {month_label} {year} for {country} and {trading_point} gas trading point"
+        f"**Selected Period**: {start_date:%d %B %Y} to {end_date:%d %B %Y} for {country} and {trading_point} gas trading point"
     )
 
     offline_limit_hours_warm = st.session_state.get(
         "offline_limit_hours_warm", st.session_state["offline_limit_hours_warm"]
     )
 
+    time_step = st.radio("Time step", ["60 min", "15 min"], horizontal=True)
+    steps_per_hour = {"60 min": 1, "15 min": 4}[time_step]
+
     initial_mode = st.radio("Is the plant initially ON or OFF?", ["ON", "OFF"])
 
     if initial_mode == "ON":
@@ -61,7 +78,7 @@ def render_optimal_dispatch(defaults, initial_state):
         if off_hours > offline_limit_hours_warm:
             initial_state = "OFF"
         else:
-            initial_state = f"OFF_{off_hours}"
+            initial_state = f"OFF_{off_hours * steps_per_hour}"
 
     if st.button("Run Optimization"):
 
@@ -72,87 +89,48 @@ def render_optimal_dispatch(defaults, initial_state):
             "emission_factor", defaults["emission_factor"]
         )
 
-        constraints_df = build_constraints_df(defaults)
-        efficiency_df = build_efficiency_df(defaults)
-        power_df = build_power_df(defaults)
-        state_df = build_state_df(defaults)
-        filtered_price_df = load_price_df(
-            "data/unified_energy_dataset.csv", country, trading_point, year, month
-        )
-
-        transition_df = create_list_states(
-            state_df, constraints_df, power_df, efficiency_df
-        )
-
-        v, policy = bellman_optimization(
-            transition_df,
-            filtered_price_df,
-            initial_state,
-            filtered_price_df.shape[0],
-            emission_factor,
-        )
-        path = []
-        state = initial_state
-        for t in range(filtered_price_df.shape[0]):
-            path.append(state)
-            state = policy[t].get(state, None)
-            if state is None:
-                break
-
-        final_df = filtered_price_df.copy()
-        final_df["Path"] = path
-
-        # Ensure merged_df is sorted by time
-        merged_df = final_df.merge(transition_df, left_on="Path", right_index=True)
-        merged_df = merged_df.sort_values("Datetime").reset_index(drop=True)
-
-        # --- Compute CSS ---
-        merged_df["CSS"] = merged_df["power_price"] - (
-            merged_df["gas_price"] / efficiency
-            + merged_df["co2_price"] * emission_factor
+        model = get_plant_model(defaults, steps_per_hour=steps_per_hour)
+        constraints_df = model.constraints_df
+        # The whole range is one horizon, the state carries over between months
+        filtered_price_df = load_price_range_df(
+            "data/unified_energy_dataset.csv",
+            country,
+            trading_point,
+            pd.Timestamp(start_date),
+            pd.Timestamp(end_date) + pd.Timedelta(days=1),
+            steps_per_hour,
         )
 
-        # --- Compute fuel cost only ---
-        merged_df["fuel_cost"] = merged_df["load"] * (
-            merged_df["gas_price"] / efficiency
-            + merged_df["co2_price"] * emission_factor
-        )
+        graph = model.graph
+        transition_df = model.transition_df
 
-        # --- Compute each revenue stream ---
-        merged_df["gross_revenue"] = merged_df["power_price"] * merged_df["load"]
-        merged_df["revenue_after_fuel"] = (
-            merged_df["gross_revenue"] - merged_df["fuel_cost"]
-        )
-        merged_df["net_revenue"] = (
-            merged_df["revenue_after_fuel"]
-            - merged_df["fixed_cost"]
-            - merged_df["variable_cost"]
-        )
+        try:
+            check_state_graph(graph, initial_state)
+            states, _, _ = solve_with_max_starts(
+                graph,
+                filtered_price_df,
+                initial_state,
+                constraints_df.loc["Max Nb Starts A day", "Use"],
+                emission_factor,
+            )
+        except (KeyError, ValueError) as error:
+            st.error(f"The optimization could not be run: {error}")
+            st.stop()
 
-        # --- Compute cumulative sums ---
-        merged_df["cumulative_gross"] = merged_df["gross_revenue"].cumsum()
-        merged_df["cumulative_after_fuel"] = merged_df["revenue_after_fuel"].cumsum()
-        merged_df["cumulative_net"] = merged_df["net_revenue"].cumsum()
-
-        total_revenue = merged_df["cumulative_net"].iloc[-1]
-        total_production = merged_df["load"].cumsum().iloc[-1]
-        revenue_per_MWh = total_revenue / total_production
-        nb_hours_on = len(merged_df[merged_df["load"] > 0]["load"])
-        nb_start = len(
-            merged_df[merged_df["Path"].isin(["RAMP_H-1", "RAMP_W-1", "RAMP_C-1"])][
-                "Path"
-            ]
+        results = dispatch_results(
+            graph, filtered_price_df, states, efficiency, emission_factor
         )
+        kpis = dispatch_kpis(results)
 
         st.markdown(
             f"""
-        - **Initital state**: at the first hour of the month the plant was in state {merged_df["Path"].iloc[0]}   
-        - **Total revenue**: the expected revenue from the application of the optimal program is {int(total_revenue)} €  
-        - **Total production**: the expected revenue from the application of the optimal program is {total_production} MWh
-        - **Revenue per MWh**: the revenue per MWh is then {round(revenue_per_MWh,2)} € / MWh  
-        - **Number of hours on**: during the month, the plant has been running for {nb_hours_on} hours 
-        - **Number of starts**: during the month, the plant has started {nb_start} times 
-        - **Final state**: at the last hour of the month, the plant is in state {merged_df["Path"].iloc[-1]}  
+        - **Initital state**: at the first hour of the period the plant was in state {kpis["initial_state"]}   
+        - **Total revenue**: the expected revenue from the application of the optimal program is {int(kpis["net_revenue"])} €  
+        - **Total production**: the expected revenue from the application of the optimal program is {kpis["production"]} MWh
+        - **Revenue per MWh**: the revenue per MWh is then {round(kpis["revenue_per_MWh"],2)} € / MWh  
+        - **Number of hours on**: during the period, the plant has been running for {kpis["hours_on"]:g} hours 
+        - **Number of starts**: during the period, the plant has started {kpis["starts"]} times 
+        - **Final state**: at the last hour of the period, the plant is in state {kpis["final_state"]}  
         """
         )
 
@@ -162,7 +140,7 @@ def render_optimal_dispatch(defaults, initial_state):
             "for the considered period."
         )
 
-        st.pyplot(plot_dispatch_chart(merged_df))
+        st.pyplot(plot_dispatch_chart(results))
 
         st.subheader("Results raw data ")
 
@@ -170,7 +148,13 @@ def render_optimal_dispatch(defaults, initial_state):
             "In the table below, you can check the market and production data for the considered period."
         )
 
-        st.dataframe(merged_df.drop(columns=["off", "minload", "fullload"]))
+        st.dataframe(results)
+
+        st.subheader("Results by period")
+
+        for tab, freq in zip(st.tabs(list(PERIODS)), PERIODS.values()):
+            with tab:
+                st.dataframe(aggregate_results(results, freq))
 
         st.subheader("Transition Matrix")
 
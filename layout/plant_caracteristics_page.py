@@ -1,3 +1,4 @@
+import pandas as pd
 import streamlit as st
 
 
@@ -77,12 +78,40 @@ def render_loads():
     )
     st.session_state["efficiency_stop"] = efficiency_stop
 
+    st.subheader("Load Levels and Heat-Rate Curve")
+
+    st.info(
+        "The running plant can be dispatched at several load levels evenly spaced between the partial and the full "
+        "load. Their efficiency is read on the heat-rate curve going through the partial load point, the points "
+        "below and the full load point."
+    )
+
+    load_levels = st.number_input(
+        "Number of load levels",
+        min_value=2,
+        max_value=20,
+        value=st.session_state["load_levels"],
+        step=1,
+    )
+    st.session_state["load_levels"] = load_levels
+
+    heat_rate_points = st.data_editor(
+        pd.DataFrame(
+            st.session_state["heat_rate_points"],
+            columns=["Power (MW)", "Efficiency (%)"],
+            dtype=float,
+        ),
+        num_rows="dynamic",
+    )
+    st.session_state["heat_rate_points"] = heat_rate_points.dropna().to_numpy().tolist()
+
 
 def render_min_off_on():
 
     st.info(
         "In this section, you can change change additionnal constraints such as the minimum hours on (meaning that that if the "
-        "plant starts, it has to stay on for at least XX hours), or the similar minimum hours off."
+        "plant starts, it has to stay on for at least XX hours), or the similar minimum hours off. You can also cap "
+        "the number of starts the plant can make in a calendar day."
     )
 
     min_hours_on = st.number_input(
@@ -103,6 +132,15 @@ def render_min_off_on():
     )
     st.session_state["min_hours_off"] = min_hours_off
 
+    max_starts_per_day = st.number_input(
+        "Maximum Number of Starts a Day",
+        min_value=0,
+        max_value=100,
+        value=st.session_state["max_starts_per_day"],
+        step=1,
+    )
+    st.session_state["max_starts_per_day"] = max_starts_per_day
+
 
 def render_costs():
 
@@ -52,7 +52,7 @@ def render_readme():
     st.markdown("### Assumptions")
     st.markdown(
         """
-    - Simulation horizon: fixed number of hours (e.g. 744 for a 31-day month).
+    - Simulation horizon: the selected date range, from a few hours to several years, solved in one piece.
     - Prices are deterministic and provided as input.
     - Single unit dispatch (one CCGT unit at a time).
     - Ramp transitions are defined in hours and are strictly respected.
@@ -1,11 +1,7 @@
 import streamlit as st
-from utils.dataframes import (
-    build_constraints_df,
-    build_efficiency_df,
-    build_power_df,
-    build_state_df,
-)
+from utils.plant_cache import get_plant_model
 from utils.plots import plot_ramp_profiles
+from utils.validation import describe_issues, validate_state_graph
 
 
 def render_summary(defaults):
@@ -14,10 +10,11 @@ def render_summary(defaults):
         "Use this page to check the caracteristics and constraints of the virtual power plant."
     )
 
-    constraints_df = build_constraints_df(defaults)
-    efficiency_df = build_efficiency_df(defaults)
-    power_df = build_power_df(defaults)
-    state_df = build_state_df(defaults)
+    model = get_plant_model(defaults)
+    constraints_df = model.constraints_df
+    efficiency_df = model.efficiency_df
+    power_df = model.power_df
+    state_df = model.state_df
 
     st.markdown(
         f"""
@@ -32,6 +29,10 @@ def render_summary(defaults):
 """
     )
 
+    issues = model.derive("issues", lambda model: validate_state_graph(model.graph))
+    for issue in describe_issues(issues):
+        st.warning(issue)
+
     st.pyplot(plot_ramp_profiles(power_df, efficiency_df))
 
     st.markdown("### Ramp State Logic Table")
@@ -0,0 +1,145 @@
+import calendar
+
+import numpy as np
+import streamlit as st
+from utils.dataframes import load_price_df, price_dataset_options
+from utils.sweep import run_sweep
+
+# (min, max) of the inputs of the plant and ramp pages, other parameters
+# can take any value from 0
+SWEEP_BOUNDS = {
+    "emission_factor": (0.0, 10.0),
+    "power_full": (20.0, 600.0),
+    "power_partial": (20.0, 600.0),
+    "power_stop": (1.0, 600.0),
+    "efficiency_full": (1.0, 100.0),
+    "efficiency_partial": (1.0, 100.0),
+    "efficiency_stop": (1.0, 100.0),
+    "load_levels": (2, 20),
+    "min_hours_on": (0, 100),
+    "min_hours_off": (0, 100),
+    "max_starts_per_day": (0, 100),
+    "startup_cost": (0.0, 1e6),
+    "variable_cost": (0.0, 100.0),
+    "hourly_fixed_cost": (0.0, 10000.0),
+    "offline_limit_hours_hot": (1, 40),
+    "offline_limit_hours_warm": (2, 200),
+    "ramp_hours_hot": (1, 3),
+    "ramp_hours_warm": (1, 4),
+    "ramp_hours_cold": (1, 4),
+}
+
+
+def sweep_values(key, low, high, steps, defaults):
+    values = np.linspace(low, high, int(steps))
+    if isinstance(defaults[key], int):
+        return sorted({int(round(value)) for value in values})
+    return [float(value) for value in values]
+
+
+def render_parameter_sweep(defaults):
+
+    st.title("Parameter Sweep")
+
+    st.info(
+        "Use this page to run the optimal dispatch for a grid of plant parameters. "
+        "Parameters that are not swept keep the values set on the other pages."
+    )
+
+    # --- Selectors ---
+    st.markdown("### Select Simulation Parameters")
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    # Options come from the price store metadata, no price is loaded here
+    try:
+        options = price_dataset_options("data/unified_energy_dataset.csv")
+    except (OSError, ValueError, KeyError) as error:
+        st.error(f"The price data could not be read: {error}")
+        return
+    months_by_year = {}
+    for period_year, period_month in options["periods"]:
+        months_by_year.setdefault(period_year, []).append(period_month)
+
+    with col1:
+        country = st.selectbox("Country", options=options["countries"], index=0)
+
+    with col2:
+        trading_point = st.selectbox(
+            "Gas Trading Point", options=options["trading_points"], index=0
+        )
+
+    with col4:
+        year = st.selectbox(
+            "Year", options=list(months_by_year), index=len(months_by_year) - 1
+        )
+
+    with col3:
+        month = st.selectbox(
+            "Month",
+            options=months_by_year[year],
+            index=len(months_by_year[year]) - 1,
+            format_func=lambda month: calendar.month_name[month],
+        )
+
+    initial_state = st.text_input("Initial state", value="OFF_20")
+
+    # --- Grid ---
+    st.markdown("### Swept Parameters")
+
+    # Only scalar parameters can be swept (not e.g. the heat-rate points)
+    keys = st.multiselect(
+        "Parameters",
+        options=[key for key, value in defaults.items() if np.isscalar(value)],
+        default=["startup_cost", "min_hours_on"],
+    )
+
+    ranges = {}
+    for key in keys:
+        current = st.session_state.get(key, defaults[key])
+        min_value, max_value = SWEEP_BOUNDS.get(key, (type(current)(0), None))
+        current = max(current, min_value)
+        if max_value is not None:
+            current = min(current, max_value)
+        bounds = {"min_value": min_value, "max_value": max_value}
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            low = st.number_input(
+                f"{key} from", value=current, key=f"sweep_{key}_low", **bounds
+            )
+        with col2:
+            high = st.number_input(
+                f"{key} to", value=current, key=f"sweep_{key}_high", **bounds
+            )
+        with col3:
+            steps = st.number_input(
+                f"{key} steps", min_value=1, value=1, key=f"sweep_{key}_steps"
+            )
+        ranges[key] = sweep_values(key, low, high, steps, defaults)
+
+    n_points = int(np.prod([len(values) for values in ranges.values()]))
+    st.markdown(f"**Grid size**: {n_points} combinations")
+
+    if st.button("Run Sweep"):
+
+        base_params = {
+            key: st.session_state.get(key, defaults[key]) for key in defaults
+        }
+        filtered_price_df = load_price_df(
+            "data/unified_energy_dataset.csv", country, trading_point, year, month
+        )
+
+        with st.spinner("Solving the grid..."):
+            results = run_sweep(
+                defaults, base_params, ranges, filtered_price_df, initial_state
+            )
+
+        st.subheader("Results")
+        st.dataframe(results)
+
+        if len(keys) == 1 and "net_revenue" in results:
+            st.line_chart(results.set_index(keys[0])["net_revenue"])
+
+    else:
+        st.info("Press the button above to run the sweep.")
@@ -0,0 +1,179 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.state_graph import StateGraph  # noqa: E402
+
+# Plant parameters of app.py
+PLANT_DEFAULTS = {
+    "min_hours_on": 4,
+    "min_hours_off": 4,
+    "max_starts_per_day": 100,
+    "load_levels": 2,
+    "heat_rate_points": [],
+    "startup_cost": 2500.0,
+    "variable_cost": 0.5,
+    "hourly_fixed_cost": 250.0,
+    "emission_factor": 0.18,
+    "efficiency_full": 55.0,
+    "efficiency_partial": 45.0,
+    "efficiency_stop": 30.0,
+    "power_full": 400.0,
+    "power_partial": 250.0,
+    "power_stop": 70.0,
+    "offline_limit_hours_hot": 10,
+    "offline_limit_hours_warm": 40,
+    "offline_limit_hours_cold": 9999,
+    "ramp_hours_hot": 1,
+    "ramp_hours_warm": 3,
+    "ramp_hours_cold": 4,
+    "power_hour_1_hot": 170.0,
+    "power_hour_2_hot": 400.0,
+    "power_hour_3_hot": 400.0,
+    "efficiency_hour_1_hot": 35.0,
+    "efficiency_hour_2_hot": 55.0,
+    "efficiency_hour_3_hot": 55.0,
+    "power_hour_1_warm": 90.0,
+    "power_hour_2_warm": 215.0,
+    "power_hour_3_warm": 350.0,
+    "power_hour_4_warm": 400.0,
+    "efficiency_hour_1_warm": 25.0,
+    "efficiency_hour_2_warm": 37.0,
+    "efficiency_hour_3_warm": 45.0,
+    "efficiency_hour_4_warm": 55.0,
+    "power_hour_1_cold": 85.0,
+    "power_hour_2_cold": 160.0,
+    "power_hour_3_cold": 275.0,
+    "power_hour_4_cold": 350.0,
+    "efficiency_hour_1_cold": 23.0,
+    "efficiency_hour_2_cold": 33.0,
+    "efficiency_hour_3_cold": 40.0,
+    "efficiency_hour_4_cold": 48.0,
+}
+
+
+def build_toy_graph(off_steps=6, min_off=2, hot_limit=4) -> StateGraph:
+    """
+    Small plant with the labels of the real model: FULL_LOAD / MIN_LOAD, a
+    STOP hour, OFF_1 .. OFF_{off_steps} then OFF, and two-hour HOT / WARM /
+    COLD ramps. A start is allowed from OFF_{min_off} on, hot until OFF_k
+    with k < hot_limit, warm until OFF_{off_steps} and cold from OFF.
+    """
+
+    rows = {}
+
+    def add(label, load, efficiency, successors, fixed_cost=0.0):
+        gas = load / efficiency if load else 0.0
+        rows[label] = (load, efficiency, fixed_cost, 2.0 * load, gas, successors)
+
+    running = ("STOP", "MIN_LOAD", "FULL_LOAD")
+    add("FULL_LOAD", 400.0, 0.55, running)
+    add("MIN_LOAD", 200.0, 0.50, running)
+    add("STOP", 0.0, 0.0, ("OFF_1",) * 3)
+    for k in range(1, off_steps + 1):
+        following = f"OFF_{k + 1}" if k < off_steps else "OFF"
+        if k < min_off:
+            start = following
+        else:
+            start = "RAMP_H-1" if k < hot_limit else "RAMP_W-1"
+        add(f"OFF_{k}", 0.0, 0.0, (following, start, start))
+    add("OFF", 0.0, 0.0, ("OFF", "RAMP_C-1", "RAMP_C-1"))
+    for ramp, start_cost in [("H", 1000.0), ("W", 3000.0), ("C", 8000.0)]:
+        add(f"RAMP_{ramp}-1", 100.0, 0.30, (f"RAMP_{ramp}-2",) * 3, start_cost)
+        add(f"RAMP_{ramp}-2", 250.0, 0.45, ("FULL_LOAD",) * 3)
+
+    labels = np.array(list(rows), dtype=object)
+    index = {label: i for i, label in enumerate(labels)}
+    load, efficiency, fixed_cost, variable_cost, gas, successors = zip(*rows.values())
+    return StateGraph(
+        labels=labels,
+        load=np.array(load),
+        efficiency=np.array(efficiency),
+        fixed_cost=np.array(fixed_cost),
+        variable_cost=np.array(variable_cost),
+        gas=np.array(gas),
+        successors=np.array(
+            [[index[label] for label in row] for row in successors], dtype=np.int64
+        ),
+    )
+
+
+def brute_force(graph, profit, start, new_day=None, max_starts=None) -> float:
+    """
+    Best total profit over every path of len(profit) hours from start, by
+    enumeration. With max_starts, at most max_starts hours of a day (new_day[t]
+    marks hour t + 1 as a new day) may be the first hour of a ramp.
+    """
+
+    starts = graph.start_mask
+    best = -np.inf
+
+    def visit(t, state, total, starts_today):
+        nonlocal best
+        starts_today += starts[state]
+        if max_starts is not None and starts_today > max_starts:
+            return
+        total += profit[t, state]
+        if t == len(profit) - 1:
+            best = max(best, total)
+            return
+        if new_day is not None and new_day[t]:
+            starts_today = 0
+        for following in set(graph.successors[state]):
+            visit(t + 1, following, total, starts_today)
+
+    visit(0, start, 0.0, 0)
+    return best
+
+
+def random_prices(rng, hours, start="2025-06-01") -> pd.DataFrame:
+    # Hourly power prices swinging around the running cost of the toy plant
+    return pd.DataFrame(
+        {
+            "Datetime": pd.date_range(start, periods=hours, freq="h"),
+            "power_price": rng.normal(110.0, 60.0, hours),
+            "gas_price": rng.normal(35.0, 5.0, hours),
+            "co2_price": np.full(hours, 70.0),
+        }
+    )
+
+
+def price_rows(start, hours, seed=0) -> pd.DataFrame:
+    # Rows of the unified price CSV
+    rng = np.random.default_rng(seed)
+    columns = ["BE", "FR", "ZTP", "PEG", "EUA Prices"]
+    rows = pd.DataFrame(rng.normal(80.0, 20.0, (hours, len(columns))), columns=columns)
+    rows.insert(0, "Datetime", pd.date_range(start, periods=hours, freq="h"))
+    return rows
+
+
+def write_csv(path, rows, mode="w"):
+    rows.to_csv(path, mode=mode, header=mode == "w", index=False)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    # Unified price CSV from January to March 2025
+    path = tmp_path / "prices.csv"
+    write_csv(path, price_rows("2025-01-01", 24 * 90))
+    return str(path)
+
+
+@pytest.fixture
+def plant_defaults():
+    return dict(PLANT_DEFAULTS)
+
+
+@pytest.fixture
+def toy_graph():
+    return build_toy_graph()
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
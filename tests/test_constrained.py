@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from conftest import random_prices
+from utils.constrained import constrained_dispatch
+from utils.optimization import compute_profit_matrix, price_arrays
+
+
+def capped_brute_force(graph, profit, start, cap):
+    # Best total profit over every path from start burning at most cap of gas
+    best = -np.inf
+
+    def visit(t, state, total, gas):
+        nonlocal best
+        total += profit[t, state]
+        gas += graph.gas[state]
+        if gas > cap:
+            return
+        if t == len(profit) - 1:
+            best = max(best, total)
+            return
+        for following in set(graph.successors[state]):
+            visit(t + 1, following, total, gas)
+
+    visit(0, start, 0.0, 0.0)
+    return best
+
+
+def uncapped_gas(toy_graph, prices_df, start_state):
+    _, kpis = constrained_dispatch(toy_graph.to_dataframe(), prices_df, start_state)
+    return kpis["gas_used"].item()
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("share", [0.3, 0.6, 0.9])
+def test_gas_cap_is_met_within_the_dual_bound(toy_graph, seed, share):
+    rng = np.random.default_rng(seed)
+    prices_df = random_prices(rng, 12)
+    cap = share * uncapped_gas(toy_graph, prices_df, "FULL_LOAD")
+
+    states, kpis = constrained_dispatch(
+        toy_graph.to_dataframe(), prices_df, "FULL_LOAD", gas_cap=cap
+    )
+
+    profit = compute_profit_matrix(toy_graph, *price_arrays(prices_df, 12))
+    optimum = capped_brute_force(
+        toy_graph, profit, toy_graph.index_of("FULL_LOAD"), cap
+    )
+    net_revenue = kpis["net_revenue"].item()
+    assert toy_graph.gas[states].sum() == kpis["gas_used"].item() <= cap
+    assert net_revenue == pytest.approx(profit[np.arange(12), states].sum())
+    assert net_revenue <= optimum + 1e-6
+    assert optimum <= kpis["dual_bound"].item() + 1e-6
+    assert kpis["gas_shadow_price"].item() > 0
+
+
+def test_loose_cap_leaves_the_optimum(toy_graph, rng):
+    prices_df = random_prices(rng, 48)
+    transition_df = toy_graph.to_dataframe()
+    free, free_kpis = constrained_dispatch(transition_df, prices_df, "OFF")
+
+    states, kpis = constrained_dispatch(
+        transition_df, prices_df, "OFF", gas_cap=free_kpis["gas_used"].item()
+    )
+
+    assert np.array_equal(states, free)
+    assert kpis["gas_shadow_price"].item() == 0.0
+    assert kpis["dual_bound"].item() == pytest.approx(kpis["net_revenue"].item())
+
+
+def test_co2_cap_is_the_gas_cap_times_ef(toy_graph, rng):
+    prices_df = random_prices(rng, 48)
+    cap = 0.5 * uncapped_gas(toy_graph, prices_df, "FULL_LOAD")
+    transition_df = toy_graph.to_dataframe()
+
+    _, gas_kpis = constrained_dispatch(
+        transition_df, prices_df, "FULL_LOAD", gas_cap=cap
+    )
+    _, co2_kpis = constrained_dispatch(
+        transition_df, prices_df, "FULL_LOAD", co2_cap=0.18 * cap
+    )
+
+    assert co2_kpis["co2_emitted"].item() <= 0.18 * cap + 1e-9
+    assert co2_kpis["net_revenue"].item() == pytest.approx(
+        gas_kpis["net_revenue"].item()
+    )
+
+
+def test_cap_below_any_schedule_raises(toy_graph, rng):
+    # Starting at full load burns gas until the STOP hour at least
+    with pytest.raises(ValueError, match="below the minimum gas"):
+        constrained_dispatch(
+            toy_graph.to_dataframe(), random_prices(rng, 24), "FULL_LOAD", gas_cap=1.0
+        )
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import brute_force
+from utils.daily_starts import solve_daily_starts, solve_with_max_starts
+from utils.optimization import compute_profit_matrix
+from utils.sweep import solve_plant
+
+
+def random_prices(rng, hours, first="2025-06-01 12:00"):
+    return pd.DataFrame(
+        {
+            "Datetime": pd.date_range(first, periods=hours, freq="h"),
+            # Swings every 4 hours so that restarting can pay off
+            "power_price": np.where(np.arange(hours) // 4 % 2, -80.0, 300.0)
+            + rng.normal(0.0, 60.0, hours),
+            "gas_price": rng.normal(35.0, 5.0, hours),
+            "co2_price": np.full(hours, 70.0),
+        }
+    )
+
+
+@pytest.mark.parametrize("max_starts", [0, 1, 2, 100])
+@pytest.mark.parametrize("start_state", ["OFF", "OFF_2", "FULL_LOAD", "STOP"])
+def test_matches_brute_force(toy_graph, rng, max_starts, start_state):
+    # 16 hours over two calendar days (12 + 4), starts at least 6 hours apart
+    prices = random_prices(rng, 16)
+    dates = prices["Datetime"].dt.normalize().to_numpy()
+    new_day = np.append(dates[1:] != dates[:-1], False)
+    profit = compute_profit_matrix(
+        toy_graph, *prices[["power_price", "gas_price", "co2_price"]].to_numpy().T
+    )
+
+    states, starts_today, value = solve_with_max_starts(
+        toy_graph, prices, start_state, max_starts
+    )
+
+    start = toy_graph.index_of(start_state)
+    assert value == pytest.approx(
+        brute_force(toy_graph, profit, start, new_day, max_starts)
+    )
+    assert states[0] == start
+    assert all(
+        following in toy_graph.successors[state]
+        for state, following in zip(states[:-1], states[1:])
+    )
+    assert profit[np.arange(len(states)), states].sum() == pytest.approx(value)
+    assert starts_today.max() <= max_starts
+
+
+def test_start_on_a_ramp_without_starts_allowed(toy_graph, rng):
+    prices = random_prices(rng, 8)
+
+    with pytest.raises(ValueError, match="max_starts_per_day=0"):
+        solve_with_max_starts(toy_graph, prices, "RAMP_H-1", 0)
+
+
+def test_solve_plant_applies_the_limit(toy_graph, rng):
+    prices = random_prices(rng, 24, first="2025-06-01 00:00")
+    arrays = prices[["power_price", "gas_price", "co2_price"]].to_numpy().T
+    datetimes = prices["Datetime"].to_numpy()
+
+    for max_starts in [0, 1]:
+        _, expected_starts, expected = solve_daily_starts(
+            toy_graph, *arrays, datetimes, "OFF", max_starts
+        )
+        states, value = solve_plant(
+            toy_graph,
+            *arrays,
+            "OFF",
+            max_starts_per_day=max_starts,
+            datetimes=datetimes
+        )
+        assert value == pytest.approx(expected)
+        assert toy_graph.start_mask[states].sum() <= max_starts
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from conftest import build_toy_graph, brute_force
+from utils.minimize import minimize_state_graph, solve_minimized
+from utils.optimization import compute_profit_matrix, extract_path, solve_bellman
+
+
+def random_prices(rng, hours):
+    # Power swings between long cheap and expensive blocks, so the plant
+    # waits in the OFF_k counters for various lengths
+    blocks = np.repeat(rng.choice([-50.0, 250.0], hours // 6 + 1), 6)[:hours]
+    return (
+        blocks + rng.normal(0.0, 40.0, hours),
+        rng.normal(35.0, 5.0, hours),
+        np.full(hours, 70.0),
+    )
+
+
+def test_runs_and_equivalent_states_are_merged():
+    graph = build_toy_graph(off_steps=30)
+    reduced, run_length, node = minimize_state_graph(graph, graph.index_of("OFF"))
+
+    # OFF_4 .. OFF_30 all wait for a warm start: one run of 27 states
+    assert reduced.n_states < graph.n_states - 20
+    assert run_length.max() == 27
+    assert (node == -1).sum() == (run_length[run_length > 0] - 1).sum()
+    assert (node[graph.labels == "FULL_LOAD"] >= 0).all()
+
+
+@pytest.mark.parametrize("start_state", ["OFF", "OFF_1", "OFF_3", "FULL_LOAD"])
+def test_matches_brute_force(rng, start_state):
+    graph = build_toy_graph(off_steps=5)
+    prices = random_prices(rng, 14)
+    profit = compute_profit_matrix(graph, *prices)
+
+    states, value = solve_minimized(graph, *prices, start_state)
+
+    assert value == pytest.approx(
+        brute_force(graph, profit, graph.index_of(start_state))
+    )
+    assert profit[np.arange(len(states)), states].sum() == pytest.approx(value)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("off_steps, min_off", [(4, 1), (12, 3), (40, 6)])
+def test_same_path_as_the_full_graph(seed, off_steps, min_off):
+    graph = build_toy_graph(off_steps=off_steps, min_off=min_off, hot_limit=min_off + 2)
+    rng = np.random.default_rng(seed)
+    prices = random_prices(rng, 300)
+
+    for start_state in ["OFF", f"OFF_{min_off}", "STOP", "FULL_LOAD"]:
+        values, actions = solve_bellman(graph, *prices)
+        expected, _, _ = extract_path(graph, values, actions, start_state)
+
+        states, value = solve_minimized(graph, *prices, start_state)
+
+        assert value == pytest.approx(values[0, graph.index_of(start_state)])
+        assert np.array_equal(states, expected)
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from conftest import random_prices
+from utils.optimization import (
+    bellman_optimization,
+    bellman_optimization_batch,
+    extract_path,
+    price_arrays,
+    solve_bellman,
+    solve_checkpointed,
+)
+
+
+@pytest.mark.parametrize("checkpoint_every", [1, 7, 24, 500])
+@pytest.mark.parametrize("start_state", ["OFF", "OFF_3", "RAMP_W-1", "FULL_LOAD"])
+def test_checkpointed_equals_full_solve(
+    toy_graph, rng, tmp_path, checkpoint_every, start_state
+):
+    power, gas, co2 = price_arrays(random_prices(rng, 300), 300)
+    values, actions = solve_bellman(toy_graph, power, gas, co2)
+    expected = extract_path(toy_graph, values, actions, start_state)
+
+    start = toy_graph.index_of(start_state)
+    for spill_dir in [None, tmp_path]:
+        path = solve_checkpointed(
+            toy_graph,
+            power,
+            gas,
+            co2,
+            start,
+            checkpoint_every=checkpoint_every,
+            spill_dir=spill_dir,
+        )
+        for result, reference in zip(path, expected):
+            assert np.array_equal(result, reference)
+
+
+def test_bellman_optimization_checkpointed_mode(toy_graph, rng):
+    transition_df = toy_graph.to_dataframe()
+    prices_df = random_prices(rng, 240)
+
+    values, actions = bellman_optimization(
+        transition_df, prices_df, "OFF_3", 240, compact=True
+    )
+    expected = extract_path(toy_graph, values, actions, "OFF_3")
+    states, path_actions, path_values = bellman_optimization(
+        transition_df, prices_df, "OFF_3", 240, checkpoint_every="auto"
+    )
+
+    assert np.array_equal(states, expected[0])
+    assert np.array_equal(path_actions, expected[1])
+    assert np.array_equal(path_values, expected[2])
+
+
+def test_batch_equals_single_solves(toy_graph, rng):
+    power = rng.normal(110.0, 60.0, (6, 200))
+    gas = rng.normal(35.0, 5.0, (6, 200))
+    co2 = np.full((6, 200), 70.0)
+
+    for start_state in ["OFF", "OFF_3", "FULL_LOAD"]:
+        values, paths, kpis = bellman_optimization_batch(
+            toy_graph, power, gas, co2, start_state
+        )
+
+        assert len(kpis) == 6
+        for scenario in range(6):
+            single, actions = solve_bellman(
+                toy_graph, power[scenario], gas[scenario], co2[scenario]
+            )
+            states, _, _ = extract_path(toy_graph, single, actions, start_state)
+            assert values[scenario] == single[0, toy_graph.index_of(start_state)]
+            assert np.array_equal(paths[scenario], states)
+
+
+def test_batch_without_feasible_path(toy_graph, rng):
+    toy_graph.successors[toy_graph.index_of("FULL_LOAD")] = -1
+    prices = rng.normal(110.0, 60.0, (2, 24))
+
+    with pytest.raises(ValueError, match="No feasible path from state FULL_LOAD"):
+        bellman_optimization_batch(toy_graph, prices, prices, prices, "FULL_LOAD")
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from conftest import price_rows, write_csv
+from utils import price_cache
+from utils.price_cache import (
+    cached_price_range,
+    clear_price_cache,
+    price_cache_stats,
+    set_price_cache_budget,
+)
+from utils.price_store import ingest_price_updates
+
+# Bytes of the Datetime and BE arrays of a 31-day month
+MONTH_BYTES = 2 * 8 * 24 * 31
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_price_cache()
+    yield
+    set_price_cache_budget(price_cache.PRICE_CACHE_BYTES)
+    clear_price_cache()
+
+
+def counts():
+    stats = price_cache_stats()
+    return stats["hits"], stats["misses"], stats["evictions"], stats["entries"]
+
+
+def test_hits_and_misses(csv_path):
+    first = cached_price_range(csv_path, "2025-01-05", "2025-01-10", ["BE"])
+    assert counts() == (0, 1, 0, 1)
+
+    second = cached_price_range(csv_path, "2025-01-12", "2025-01-13", ["BE"])
+    assert counts() == (1, 1, 0, 1)
+    assert len(first["BE"]) == 5 * 24 and len(second["BE"]) == 24
+
+    # Other columns and months are entries of their own
+    cached_price_range(csv_path, "2025-01-05", "2025-01-10", ["BE", "ZTP"])
+    cached_price_range(csv_path, "2025-01-30", "2025-02-02", ["BE"])
+    assert counts() == (2, 3, 0, 3)
+
+
+def test_ranges_are_read_only_views_of_shared_arrays(csv_path):
+    first = cached_price_range(csv_path, "2025-01-05", "2025-01-10", ["BE"])
+    second = cached_price_range(csv_path, "2025-01-01", "2025-02-01", ["BE"])
+
+    assert np.shares_memory(first["BE"], second["BE"])
+    for values in [*first.values(), *second.values()]:
+        assert not values.flags.writeable
+    with pytest.raises(ValueError):
+        first["BE"][0] = 0.0
+
+    # A range over two months is a read-only copy
+    spanning = cached_price_range(csv_path, "2025-01-31", "2025-02-02", ["BE"])
+    assert not spanning["BE"].flags.writeable
+    assert len(spanning["BE"]) == 48
+
+
+def test_eviction_keeps_the_budget(csv_path):
+    set_price_cache_budget(MONTH_BYTES)
+
+    cached_price_range(csv_path, "2025-01-01", "2025-01-02", ["BE"])
+    cached_price_range(csv_path, "2025-03-01", "2025-03-02", ["BE"])
+    assert counts() == (0, 2, 1, 1)
+    assert price_cache_stats()["bytes"] <= MONTH_BYTES
+
+    # January was the least recently used
+    cached_price_range(csv_path, "2025-03-05", "2025-03-06", ["BE"])
+    cached_price_range(csv_path, "2025-01-01", "2025-01-02", ["BE"])
+    assert counts() == (1, 3, 2, 1)
+
+    set_price_cache_budget(0)
+    assert counts()[2:] == (3, 0)
+    assert price_cache_stats()["bytes"] == 0
+
+
+def test_ingested_month_replaces_its_stale_entry(csv_path):
+    before = cached_price_range(csv_path, "2025-03-30", "2025-04-01", ["BE"])
+    write_csv(csv_path, price_rows("2025-03-31", 24, seed=1), mode="a")
+    ingest_price_updates(csv_path)
+
+    after = cached_price_range(csv_path, "2025-03-30", "2025-04-01", ["BE"])
+
+    assert counts() == (0, 2, 0, 1)
+    assert np.allclose(after["BE"][24:], price_rows("2025-03-31", 24, seed=1)["BE"])
+    assert not np.array_equal(before["BE"], after["BE"])
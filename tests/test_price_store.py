@@ -0,0 +1,181 @@
+import pandas as pd
+import pytest
+from conftest import price_rows, write_csv
+from utils import price_store
+from utils.dataframes import price_dataset_options
+from utils.price_store import (
+    ingest_price_updates,
+    partition_revisions,
+    price_store_metadata,
+    read_metadata,
+    read_price_range,
+    store_path,
+)
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    # (file name, offset) of every source read
+    calls = []
+    read_source = price_store.read_source
+
+    def recording(path, offset=0):
+        calls.append((path.name, offset))
+        return read_source(path, offset)
+
+    monkeypatch.setattr(price_store, "read_source", recording)
+    return calls
+
+
+def test_month_round_trip_equals_csv(csv_path):
+    stored = read_price_range(csv_path, "2025-02-01", "2025-03-01")
+
+    parsed = pd.read_csv(csv_path, parse_dates=["Datetime"])
+    expected = parsed[parsed["Datetime"].dt.month == 2].reset_index(drop=True)
+    pd.testing.assert_frame_equal(stored, expected, check_dtype=False)
+
+
+def test_dataset_options_of_missing_or_empty_dataset(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        price_dataset_options(str(tmp_path / "missing.csv"))
+
+    empty = tmp_path / "empty.csv"
+    write_csv(empty, price_rows("2025-01-01", 0))
+    with pytest.raises(ValueError, match="No prices"):
+        price_dataset_options(str(empty))
+
+
+def test_append_only_ingest_rewrites_only_changed_months(csv_path, parsed):
+    metadata, _ = ingest_price_updates(csv_path)
+    before = partition_revisions(metadata)
+    offset = metadata["sources"]["prices.csv"]["offset"]
+
+    # The last day of March and two days of April
+    write_csv(csv_path, price_rows("2025-03-31", 72, seed=1), mode="a")
+    parsed.clear()
+    metadata, changed = ingest_price_updates(csv_path)
+
+    assert parsed == [("prices.csv", offset)]
+    assert changed == ["2025-03", "2025-04"]
+    after = partition_revisions(metadata)
+    assert after[2025, 1] == before[2025, 1]
+    assert after[2025, 2] == before[2025, 2]
+    assert after[2025, 3] != before[2025, 3]
+    assert metadata["partitions"]["2025-04"]["rows"] == 48
+
+    # The appended rows replace the ones given before for the same hours
+    expected = pd.concat(
+        [price_rows("2025-01-01", 24 * 90), price_rows("2025-03-31", 72, seed=1)]
+    ).drop_duplicates("Datetime", keep="last")
+    stored = read_price_range(csv_path, "2025-03-30", "2025-04-03")
+    expected = expected[expected["Datetime"] >= "2025-03-30"].reset_index(drop=True)
+    pd.testing.assert_frame_equal(stored, expected, check_dtype=False)
+
+    assert ingest_price_updates(csv_path)[1] == []
+
+
+def test_sibling_file_is_ingested(csv_path, parsed):
+    ingest_price_updates(csv_path)
+    sibling = store_path(csv_path).with_name("prices_2025-04.csv")
+    write_csv(sibling, price_rows("2025-04-01", 24))
+
+    parsed.clear()
+    metadata, changed = ingest_price_updates(csv_path)
+
+    assert parsed == [("prices_2025-04.csv", 0)]
+    assert changed == ["2025-04"]
+    assert metadata["partitions"]["2025-04"]["rows"] == 24
+
+
+def test_rewritten_source_rebuilds_and_retires_revisions(csv_path):
+    metadata, _ = ingest_price_updates(csv_path)
+    old = metadata["partitions"]["2025-01"]["revision"]
+    write_csv(csv_path, price_rows("2025-01-01", 24 * 31, seed=2))
+
+    metadata, changed = ingest_price_updates(csv_path)
+
+    assert changed == ["2025-01"]
+    assert metadata["partitions"]["2025-01"]["revision"] != old
+    # Readers of the previous metadata can still load the replaced revisions
+    store = store_path(csv_path)
+    assert f"2025/01/{old}" in metadata["retired"]
+    assert (store / f"2025/01/{old}" / "BE.npy").exists()
+
+
+def test_edited_early_row_rebuilds(csv_path):
+    ingest_price_updates(csv_path)
+    rows = price_rows("2025-01-01", 24 * 90)
+    rows.loc[5, "BE"] = 9.0
+    write_csv(csv_path, rows)
+
+    metadata, changed = ingest_price_updates(csv_path)
+
+    assert changed == ["2025-01", "2025-02", "2025-03"]
+    stored = read_price_range(csv_path, "2025-01-01 05:00", "2025-01-01 06:00")
+    assert stored["BE"].tolist() == [9.0]
+
+
+def test_last_line_without_line_break(csv_path):
+    with open(csv_path, "rb+") as file:
+        file.seek(-1, 2)
+        file.truncate()
+
+    metadata, _ = ingest_price_updates(csv_path)
+    assert metadata["partitions"]["2025-03"]["rows"] == 24 * 31
+
+    # The line is read again, completed, with the next append
+    with open(csv_path, "a") as file:
+        file.write("1\n")
+    write_csv(csv_path, price_rows("2025-04-01", 24, seed=1), mode="a")
+    metadata, changed = ingest_price_updates(csv_path)
+
+    assert changed == ["2025-03", "2025-04"]
+    expected = pd.read_csv(csv_path, parse_dates=["Datetime"])
+    stored = read_price_range(csv_path, "2025-01-01", "2025-05-01")
+    pd.testing.assert_frame_equal(stored, expected, check_dtype=False)
+
+
+def test_retired_revisions_are_removed_after_the_grace_period(csv_path, monkeypatch):
+    metadata, _ = ingest_price_updates(csv_path)
+    old = metadata["partitions"]["2025-03"]["revision"]
+    write_csv(csv_path, price_rows("2025-03-31", 48, seed=1), mode="a")
+    ingest_price_updates(csv_path)
+
+    monkeypatch.setattr(price_store, "RETAIN_SECONDS", 0)
+    metadata, changed = ingest_price_updates(csv_path)
+
+    assert changed == []
+    assert metadata["retired"] == {}
+    assert read_metadata(store_path(csv_path))["retired"] == {}
+    assert not (store_path(csv_path) / f"2025/03/{old}").exists()
+
+
+def test_reader_retries_on_removed_revision(csv_path, monkeypatch):
+    stale, _ = ingest_price_updates(csv_path)
+    write_csv(csv_path, price_rows("2025-03-31", 48, seed=1), mode="a")
+    monkeypatch.setattr(price_store, "RETAIN_SECONDS", 0)
+    ingest_price_updates(csv_path)
+    ingest_price_updates(csv_path)
+
+    # First read on metadata older than the revisions left on disk
+    served = iter([stale])
+    metadata = price_store.price_store_metadata
+    monkeypatch.setattr(
+        price_store,
+        "price_store_metadata",
+        lambda path: next(served, None) or metadata(path),
+    )
+
+    prices = read_price_range(csv_path, "2025-03-31", "2025-04-02", ["BE"])
+    assert len(prices) == 48
+
+
+def test_metadata_read_does_not_ingest(csv_path, parsed):
+    ingest_price_updates(csv_path)
+    write_csv(csv_path, price_rows("2025-04-01", 24, seed=1), mode="a")
+
+    parsed.clear()
+    metadata = price_store_metadata(csv_path)
+
+    assert parsed == []
+    assert "2025-04" not in metadata["partitions"]
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from conftest import random_prices
+from utils.optimization import extract_path, price_arrays, solve_bellman
+from utils.rolling import rolling_horizon_dispatch
+
+
+def solve_each_window(graph, prices_df, start_state, horizon, commit):
+    # One full solve per window from the committed state, data cut at the end
+    window = len(prices_df)
+    power, gas, co2 = price_arrays(prices_df, window)
+    states = []
+    state = graph.index_of(start_state)
+    for start in range(0, window, commit):
+        end = min(start + horizon, window)
+        values, actions = solve_bellman(
+            graph, power[start:end], gas[start:end], co2[start:end]
+        )
+        plan, _, _ = extract_path(graph, values, actions, state)
+        steps = min(commit, window - start)
+        states.extend(plan[:steps])
+        state = graph.successors[plan[steps - 1], actions[steps - 1, plan[steps - 1]]]
+    return np.array(states)
+
+
+@pytest.mark.parametrize("horizon, commit", [(24, 24), (48, 12), (30, 7), (6, 1)])
+@pytest.mark.parametrize("start_state", ["OFF", "OFF_2", "FULL_LOAD"])
+def test_rolling_horizon_equals_window_by_window_solves(
+    toy_graph, rng, horizon, commit, start_state
+):
+    prices_df = random_prices(rng, 100)
+
+    schedule, kpis = rolling_horizon_dispatch(
+        toy_graph.to_dataframe(), prices_df, start_state, horizon, commit
+    )
+
+    expected = solve_each_window(toy_graph, prices_df, start_state, horizon, commit)
+    assert np.array_equal(schedule["Path"].to_numpy(), toy_graph.labels[expected])
+    assert schedule["window"].tolist() == [hour // commit for hour in range(100)]
+    assert kpis["net_revenue"].item() == pytest.approx(schedule["net_revenue"].sum())
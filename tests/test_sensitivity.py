@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from conftest import random_prices
+from utils.optimization import extract_path, price_arrays, solve_bellman
+from utils.sensitivity import price_sensitivities
+
+PRICE_COLUMNS = {"power": "power_price", "gas": "gas_price", "co2": "co2_price"}
+
+
+def optimum(graph, prices_df, start_state):
+    values, _ = solve_bellman(graph, *price_arrays(prices_df, len(prices_df)))
+    return values[0, graph.index_of(start_state)]
+
+
+@pytest.mark.parametrize("start_state", ["OFF", "OFF_3", "FULL_LOAD"])
+@pytest.mark.parametrize("bump", [1.0, 25.0])
+def test_sensitivities_equal_bumped_re_solves(toy_graph, rng, start_state, bump):
+    prices_df = random_prices(rng, 72)
+    sensitivities = price_sensitivities(
+        toy_graph.to_dataframe(), prices_df, start_state, bump=bump
+    )
+    base = optimum(toy_graph, prices_df, start_state)
+
+    for name, column in PRICE_COLUMNS.items():
+        for hour in range(72):
+            for sign, suffix in [(1, "up"), (-1, "down")]:
+                bumped = prices_df.copy()
+                bumped.loc[hour, column] += sign * bump
+                change = optimum(toy_graph, bumped, start_state) - base
+                assert sensitivities.loc[hour, f"{name}_{suffix}"] == pytest.approx(
+                    change, abs=1e-6
+                )
+
+
+def test_derivatives_follow_the_optimal_path(toy_graph, rng):
+    prices_df = random_prices(rng, 72)
+    sensitivities = price_sensitivities(toy_graph.to_dataframe(), prices_df, "OFF")
+
+    values, actions = solve_bellman(toy_graph, *price_arrays(prices_df, 72))
+    states, _, _ = extract_path(toy_graph, values, actions, "OFF")
+    assert sensitivities["Path"].tolist() == toy_graph.labels[states].tolist()
+    assert np.array_equal(sensitivities["power"], toy_graph.energy[states])
+    assert np.allclose(sensitivities["co2"], -0.18 * toy_graph.gas[states])
+
+    # Away from kinks the bumped change is the derivative times the bump
+    smooth = ~sensitivities["power_kink"]
+    assert smooth.any() and sensitivities["power_kink"].any()
+    assert np.allclose(
+        sensitivities.loc[smooth, "power_up"], sensitivities.loc[smooth, "power"]
+    )
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils.stochastic import estimate_price_regimes, stochastic_bellman_optimization
+
+
+def price_df(power_price):
+    hours = len(power_price)
+    return pd.DataFrame(
+        {
+            "Datetime": pd.date_range("2025-06-01", periods=hours, freq="h"),
+            "power_price": power_price,
+            "gas_price": np.full(hours, 35.0),
+            "co2_price": np.full(hours, 70.0),
+        }
+    )
+
+
+def test_tied_prices_leave_no_empty_regime(toy_graph, rng):
+    # A quarter of the hours at 0 €/MWh makes several quantile edges equal
+    power_price = rng.normal(100.0, 30.0, 400)
+    power_price[rng.permutation(400)[:100]] = 0.0
+
+    regime_prices, transition_matrix, regimes = estimate_price_regimes(
+        price_df(power_price), n_regimes=10
+    )
+
+    n_regimes = len(regime_prices)
+    assert n_regimes < 10
+    assert not np.isnan(regime_prices).any()
+    assert np.array_equal(np.unique(regimes), np.arange(n_regimes))
+    assert transition_matrix.shape == (n_regimes, n_regimes)
+    assert np.allclose(transition_matrix.sum(axis=1), 1.0)
+
+    values, _ = stochastic_bellman_optimization(
+        toy_graph.to_dataframe(), regime_prices, transition_matrix, 48
+    )
+    assert np.isfinite(values).all()
+
+
+def test_missing_prices_raise(rng):
+    prices = price_df(rng.normal(100.0, 30.0, 200))
+    prices["gas_price"] = np.nan
+
+    with pytest.raises(ValueError, match="Missing prices"):
+        estimate_price_regimes(prices, n_regimes=4)
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils.dataframes import build_load_levels
+from utils.sweep import build_plant_tables, run_sweep
+from utils.transition import build_state_graph, list_state_specs
+
+
+def plant_graph(defaults, params):
+    state_df, constraints_df, power_df, efficiency_df = build_plant_tables(
+        defaults, params
+    )
+    return build_state_graph(
+        list_state_specs(state_df, constraints_df),
+        constraints_df,
+        power_df,
+        efficiency_df,
+    )
+
+
+def test_ramp_states_read_their_hour_of_the_tables(plant_defaults):
+    _, _, power_df, efficiency_df = build_plant_tables(plant_defaults, {})
+    graph = plant_graph(plant_defaults, {})
+
+    for k in (1, 2, 3):
+        state = graph.index_of(f"RAMP_W-{k}")
+        assert graph.load[state] == power_df.loc["RAMP_W", f"Hour {k}"]
+        assert graph.efficiency[state] == efficiency_df.loc["RAMP_W", f"Hour {k}"] / 100
+
+
+def test_ramp_longer_than_the_tables_raises(plant_defaults):
+    with pytest.raises(KeyError, match="Hour 5"):
+        plant_graph(plant_defaults, {"ramp_hours_warm": 6, "min_hours_on": 8})
+
+
+def test_sweep_reports_points_without_ramp_values(plant_defaults, rng):
+    prices_df = pd.DataFrame(
+        {
+            "Datetime": pd.date_range("2025-06-01", periods=48, freq="h"),
+            "power_price": rng.normal(100.0, 30.0, 48),
+            "gas_price": np.full(48, 35.0),
+            "co2_price": np.full(48, 70.0),
+        }
+    )
+
+    results = run_sweep(
+        plant_defaults,
+        {"min_hours_on": 8},
+        {"ramp_hours_warm": [3, 6], "load_levels": [2, 1]},
+        prices_df,
+        "OFF",
+        max_workers=1,
+    )
+
+    statuses = results.set_index(["ramp_hours_warm", "load_levels"])["status"]
+    assert statuses[3, 2] == "ok"
+    assert "Hour 5" in statuses[6, 2]
+    assert "load_levels" in statuses[3, 1]
+
+
+def test_load_levels_need_partial_and_full_load(plant_defaults):
+    levels = build_load_levels(plant_defaults, {"load_levels": 3})
+    assert levels.index.tolist() == ["MIN_LOAD", "LOAD_2", "FULL_LOAD"]
+    assert levels.loc["FULL_LOAD"].tolist() == [400.0, 55.0]
+
+    with pytest.raises(ValueError, match="load_levels"):
+        build_load_levels(plant_defaults, {"load_levels": 1})
@@ -0,0 +1,106 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from utils.dataframes import load_price_df, price_dataset_options
+from utils.optimization import path_kpis, price_arrays
+from utils.state_graph import as_state_graph
+from utils.sweep import solve_plant
+from utils.validation import check_state_graph
+
+# Plant model of the backtest, set once per worker process by _init_worker
+_worker_graph = None
+
+
+def available_combinations(options: dict) -> list:
+    """
+    Every (country, trading point, year, month) cell for which the dataset has
+    the power and gas columns (options of price_dataset_options).
+    """
+
+    return [
+        (country, trading_point, year, month)
+        for country, trading_point, (year, month) in itertools.product(
+            options["countries"], options["trading_points"], options["periods"]
+        )
+    ]
+
+
+def _init_worker(graph):
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _solve_cell(
+    power_price, gas_price, co2_price, datetimes, start_state, ef, max_starts
+):
+    try:
+        states, net_revenue = solve_plant(
+            _worker_graph,
+            power_price,
+            gas_price,
+            co2_price,
+            start_state,
+            ef,
+            max_starts,
+            datetimes,
+        )
+    except (KeyError, ValueError) as error:
+        return None, {"status": str(error.args[0])}
+
+    kpis = path_kpis(_worker_graph, states, net_revenue).iloc[0].to_dict()
+    kpis["status"] = "ok"
+    return states, kpis
+
+
+def run_backtest_matrix(
+    transition_df,
+    csv_path: str,
+    start_state: str,
+    ef=0.18,
+    max_workers=None,
+    cells=None,
+    max_starts_per_day=None,
+) -> tuple:
+    """
+    Solve the plant for every (country, trading point, year, month) available
+    in the unified dataset, or only for the given cells, with at most
+    max_starts_per_day starts a day if given. Each cell reads its month and
+    columns from the price store; the plant model is sent once to each
+    worker.
+
+    Returns (summary, paths, price_dfs): one KPI row per cell, and for the
+    drill-down the optimal state index path and prices of each cell, keyed by
+    (country, trading point, year, month).
+    """
+
+    graph = check_state_graph(as_state_graph(transition_df))
+    if cells is None:
+        cells = available_combinations(price_dataset_options(csv_path))
+
+    price_dfs = {cell: load_price_df(csv_path, *cell) for cell in cells}
+    arrays = [price_arrays(price_dfs[cell], price_dfs[cell].shape[0]) for cell in cells]
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_worker, initargs=(graph,)
+    ) as pool:
+        results = list(
+            pool.map(
+                _solve_cell,
+                *zip(*arrays),
+                [price_dfs[cell]["Datetime"].to_numpy() for cell in cells],
+                [start_state] * len(cells),
+                [ef] * len(cells),
+                [max_starts_per_day] * len(cells),
+            )
+        )
+
+    summary = pd.DataFrame(
+        [kpis for _, kpis in results],
+        index=pd.MultiIndex.from_tuples(
+            cells, names=["country", "trading_point", "year", "month"]
+        ),
+    )
+    paths = {cell: states for cell, (states, _) in zip(cells, results)}
+
+    return summary, paths, price_dfs
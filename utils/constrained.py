@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+from utils.optimization import (
+    backward_pass,
+    compute_profit_matrix,
+    extract_path,
+    path_kpis,
+    price_arrays,
+)
+from utils.state_graph import as_state_graph, reachable_masks
+
+
+def _capped_usage(graph, window, gas_cap, co2_cap, ef):
+    """
+    Hourly weight of graph.gas in the capped quantity and the cap itself.
+    CO2 is ef x gas, so with a scalar ef both caps limit the same quantity and
+    only the tighter one can bind.
+
+    Returns (weight, cap, binding): binding is "gas" or "co2".
+    """
+
+    if co2_cap is None:
+        return np.ones(window), np.inf if gas_cap is None else gas_cap, "gas"
+    hourly_ef = np.broadcast_to(np.asarray(ef, dtype=float), (window,))
+    if gas_cap is None:
+        return hourly_ef, co2_cap, "co2"
+    if np.ndim(ef) > 0:
+        raise ValueError(
+            "Gas and CO2 caps can only be combined with a scalar emission factor"
+        )
+    if gas_cap * ef <= co2_cap:
+        return np.ones(window), gas_cap, "gas"
+    return hourly_ef, co2_cap, "co2"
+
+
+def constrained_dispatch(
+    transition_df,
+    prices_df: pd.DataFrame,
+    start_state: str,
+    gas_cap=None,
+    co2_cap=None,
+    ef=0.18,
+    tol=1e-4,
+    max_solves=60,
+) -> tuple:
+    """
+    Optimal dispatch with the total gas burn (MWh) and/or CO2 emissions (t)
+    over prices_df capped, by Lagrangian relaxation: the multiplier lambda is
+    added to the gas (or CO2) price and bisected until the optimal schedule
+    just meets the cap. The profit and usage matrices and the reachability
+    masks are computed once, each iteration is a single backward pass.
+
+    The schedule returned is the best feasible one found; lambda is the shadow
+    price of the cap (EUR per MWh of gas or per t of CO2, 0 if the cap does
+    not bind) and dual_bound is an upper bound on the optimal capped revenue.
+
+    Returns (states, kpis): the state index path and its KPI row with the gas
+    burnt, CO2 emitted and shadow prices.
+    """
+
+    graph = as_state_graph(transition_df)
+    window = prices_df.shape[0]
+    power_price, gas_price, co2_price = price_arrays(prices_df, window)
+    profit = compute_profit_matrix(graph, power_price, gas_price, co2_price, ef)
+
+    start = graph.index_of(start_state)
+    reachable = reachable_masks(graph, start, window)
+    hours = np.arange(window)
+
+    weight, cap, binding = _capped_usage(graph, window, gas_cap, co2_cap, ef)
+    usage = np.multiply.outer(weight, graph.gas)
+
+    def solve(multiplier):
+        # Schedule, capped usage and Lagrangian value for one multiplier
+        values, actions = backward_pass(
+            graph,
+            profit - multiplier * usage,
+            np.zeros(graph.n_states),
+            reachable,
+        )
+        states, _, _ = extract_path(graph, values, actions, start)
+        return states, usage[hours, states].sum(), values[0, start]
+
+    solves = 1
+    multiplier = 0.0
+    states, used, dual_value = solve(0.0)
+    best = states
+
+    if used > cap:
+        # Least usage any schedule can reach, the cap is infeasible above it
+        values, actions = backward_pass(
+            graph, -usage, np.zeros(graph.n_states), reachable
+        )
+        least = -values[0, start]
+        solves += 1
+        if least > cap:
+            raise ValueError(
+                f"The {binding} cap ({cap:g}) is below the minimum "
+                f"{binding} of any schedule ({least:g})"
+            )
+
+        # Bracket the shadow price, then bisect on it
+        low, high = 0.0, 1.0
+        states, used, dual_value = solve(high)
+        solves += 1
+        while used > cap and solves < max_solves:
+            low, high = high, 2 * high
+            states, used, dual_value = solve(high)
+            solves += 1
+        best, multiplier, dual_bound = states, high, dual_value + high * cap
+
+        while high - low > tol * max(1.0, high) and solves < max_solves:
+            middle = (low + high) / 2
+            states, used, dual_value = solve(middle)
+            solves += 1
+            dual_bound = min(dual_bound, dual_value + middle * cap)
+            if used > cap:
+                low = middle
+            else:
+                high = middle
+                best, multiplier = states, middle
+                if used == cap:
+                    break
+
+        if usage[hours, best].sum() > cap:
+            raise ValueError(
+                f"No schedule meeting the {binding} cap found in {max_solves} solves"
+            )
+    else:
+        dual_bound = dual_value
+
+    gas_used = graph.gas[best].sum()
+    hourly_ef = np.broadcast_to(np.asarray(ef, dtype=float), (window,))
+
+    kpis = path_kpis(graph, best, profit[hours, best].sum())
+    kpis["gas_used"] = gas_used
+    kpis["co2_emitted"] = (hourly_ef * graph.gas[best]).sum()
+    kpis["gas_shadow_price"] = multiplier if binding == "gas" else 0.0
+    kpis["co2_shadow_price"] = multiplier if binding == "co2" else 0.0
+    kpis["dual_bound"] = dual_bound
+    kpis["solves"] = solves
+
+    return best, kpis
@@ -0,0 +1,192 @@
+from collections import deque
+
+import numpy as np
+from utils.minimize import solve_minimized
+from utils.optimization import backward_step, compute_profit_matrix, price_arrays
+from utils.state_graph import as_state_graph
+
+
+def distance_from_starts(graph) -> np.ndarray:
+    # Fewest hours from the first hour of any ramp to each state (BFS)
+    distance = np.full(graph.n_states, np.iinfo(np.int64).max)
+    queue = deque(np.flatnonzero(graph.start_mask))
+    distance[list(queue)] = 0
+
+    while queue:
+        state = queue.popleft()
+        for following in set(graph.successors[state]):
+            if following >= 0 and distance[following] > distance[state] + 1:
+                distance[following] = distance[state] + 1
+                queue.append(following)
+
+    return distance
+
+
+def min_hours_between_starts(graph, distance=None):
+    # Shortest start -> ... -> start cycle, None if the plant cannot restart
+    distance = distance_from_starts(graph) if distance is None else distance
+    starts = graph.start_mask
+    gaps = [
+        distance[state] + 1
+        for state in range(graph.n_states)
+        if distance[state] < np.iinfo(np.int64).max
+        and starts[graph.successors[state][graph.successors[state] >= 0]].any()
+    ]
+    return min(gaps) if gaps else None
+
+
+def build_daily_starts_graph(graph, max_starts, day_hours=24):
+    """
+    Augment the state with the number of starts made since the beginning of
+    the day. Only the (state, counter) pairs that can occur are kept:
+
+    - the counter never needs to exceed the number of starts that fit in a
+      day (two starts are at least min_hours_between_starts apart);
+    - the k-th start of the day was at least (k - 1) x gap + distance(state)
+      hours ago, which must fit in the day, so e.g. long OFF_i states only
+      exist with a counter of 0;
+    - the first hour of a ramp always has a counter >= 1.
+
+    Returns (node_index, base, counter, within_day, new_day): node_index maps
+    (counter, state) to an augmented node (-1 if pruned), base / counter give
+    the plant state and counter of each node, and within_day / new_day are the
+    node x action successor tables when the next hour is in the same day or
+    starts a new one (-1 for transitions exceeding max_starts).
+    """
+
+    starts = graph.start_mask
+    distance = distance_from_starts(graph)
+    gap = min_hours_between_starts(graph, distance)
+    max_counter = (
+        max_starts if gap is None else min(max_starts, 1 + (day_hours - 1) // gap)
+    )
+
+    counters = np.arange(max_counter + 1)[:, None]
+    feasible = np.where(
+        counters == 0,
+        ~starts[None, :],
+        (counters - 1) * (gap or 0) + distance[None, :] <= day_hours - 1,
+    )
+
+    node_index = np.full(feasible.shape, -1, dtype=np.int64)
+    node_index[feasible] = np.arange(feasible.sum())
+    counter, base = np.nonzero(feasible)
+
+    # Successor tables over the augmented nodes
+    following = graph.successors[base]
+    known = following >= 0
+    started = np.where(known, starts[np.maximum(following, 0)], False).astype(int)
+
+    def successor_nodes(next_counter):
+        allowed = known & (next_counter <= max_counter)
+        return np.where(
+            allowed,
+            node_index[np.minimum(next_counter, max_counter), np.maximum(following, 0)],
+            -1,
+        )
+
+    within_day = successor_nodes(counter[:, None] + started)
+    new_day = successor_nodes(started)
+
+    return node_index, base, counter, within_day, new_day
+
+
+def count_starts_today(started, new_day):
+    # Running number of starts since the first hour of the day
+    day_start = np.append(True, new_day[:-1])
+    total = np.cumsum(started)
+    before_day = (total - started)[day_start]
+    return total - before_day[np.cumsum(day_start) - 1]
+
+
+def solve_daily_starts(
+    graph,
+    power_price,
+    gas_price,
+    co2_price,
+    datetimes,
+    start_state,
+    max_starts_per_day,
+    ef=0.18,
+):
+    """
+    Optimal dispatch with at most max_starts_per_day starts per calendar day
+    of datetimes (one per price step). When the limit cannot bind (more
+    starts allowed than fit in a day) the plain solver is used.
+
+    Returns (states, starts_today, value): the plant state index path, the
+    number of starts made so far in the day at each hour, and the optimal net
+    revenue.
+    """
+
+    graph = as_state_graph(graph)
+    window = len(power_price)
+    starts = graph.start_mask
+    start = graph.index_of(start_state)
+
+    # new_day[t]: hour t + 1 is the first hour of a new calendar day
+    dates = np.asarray(datetimes).astype("datetime64[D]")[:window]
+    day_hours = int(np.unique(dates, return_counts=True)[1].max())
+    new_day = np.append(dates[1:] != dates[:-1], False)
+
+    if starts[start] and max_starts_per_day < 1:
+        raise ValueError(
+            f"Start state {start_state} already counts a start today but "
+            f"max_starts_per_day={max_starts_per_day}"
+        )
+
+    gap = min_hours_between_starts(graph)
+    if gap is None or max_starts_per_day >= 1 + (day_hours - 1) // gap:
+        states, value = solve_minimized(
+            graph, power_price, gas_price, co2_price, start_state, ef
+        )
+        return states, count_starts_today(starts[states], new_day), value
+
+    node_index, base, counter, within_day, following_day = build_daily_starts_graph(
+        graph, int(max_starts_per_day), day_hours
+    )
+    start_node = node_index[int(starts[start]), start]
+    if start_node < 0:
+        raise ValueError(
+            f"Start state {start_state} cannot occur with at most "
+            f"{max_starts_per_day} starts per day"
+        )
+
+    profit = compute_profit_matrix(graph, power_price, gas_price, co2_price, ef)
+
+    values = np.zeros((window + 1, len(base)))
+    actions = np.empty((window, len(base)), dtype=np.int8)
+    for t in reversed(range(window)):
+        successors = following_day if new_day[t] else within_day
+        values[t], actions[t] = backward_step(
+            profit[t, base], values[t + 1], successors
+        )
+
+    node = start_node
+    nodes = np.empty(window, dtype=np.int64)
+    for t in range(window):
+        nodes[t] = node
+        action = actions[t, node]
+        if action < 0:
+            raise ValueError(
+                f"No feasible transition from state {graph.labels[base[node]]} "
+                f"at hour {t}"
+            )
+        node = (following_day if new_day[t] else within_day)[node, action]
+
+    return base[nodes], counter[nodes], values[0, start_node]
+
+
+def solve_with_max_starts(
+    transition_df, prices_df, start_state, max_starts_per_day, ef=0.18
+):
+    # solve_daily_starts over the prices and calendar days of prices_df
+    window = prices_df.shape[0]
+    return solve_daily_starts(
+        transition_df,
+        *price_arrays(prices_df, window),
+        prices_df["Datetime"].to_numpy()[:window],
+        start_state,
+        max_starts_per_day,
+        ef,
+    )
@@ -1,28 +1,30 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
+from utils.price_cache import cached_price_range
+from utils.price_store import price_store_metadata, store_periods
 
+COUNTRY_CODES = {"Belgium": "BE", "France": "FR"}
+GAS_TRADING_POINTS = ["ZTP", "PEG"]
+
+
+def build_constraints_df(defaults: dict, params=None) -> pd.DataFrame:
+    params = st.session_state if params is None else params
 
-def build_constraints_df(defaults: dict) -> pd.DataFrame:
     return pd.DataFrame(
         {
             "Use": {
-                "Min hours on": st.session_state.get(
-                    "min_hours_on", defaults["min_hours_on"]
-                ),
-                "Min hours off": st.session_state.get(
-                    "min_hours_off", defaults["min_hours_off"]
-                ),
-                "Max Nb Starts A day": 100,
-                "Startup Cost": st.session_state.get(
-                    "startup_cost", defaults["startup_cost"]
-                ),
-                "Variable Cost": st.session_state.get(
-                    "variable_cost", defaults["variable_cost"]
-                ),
-                "Hourly fixed cost": st.session_state.get(
+                "Min hours on": params.get("min_hours_on", defaults["min_hours_on"]),
+                "Min hours off": params.get("min_hours_off", defaults["min_hours_off"]),
+                "Max Nb Starts A day": params.get(
+                    "max_starts_per_day", defaults["max_starts_per_day"]
+                ),
+                "Startup Cost": params.get("startup_cost", defaults["startup_cost"]),
+                "Variable Cost": params.get("variable_cost", defaults["variable_cost"]),
+                "Hourly fixed cost": params.get(
                     "hourly_fixed_cost", defaults["hourly_fixed_cost"]
                 ),
-                "Emission Factor": st.session_state.get(
+                "Emission Factor": params.get(
                     "emission_factor", defaults["emission_factor"]
                 ),
             }
@@ -30,85 +32,118 @@ def build_constraints_df(defaults: dict) -> pd.DataFrame:
     )
 
 
-def build_efficiency_df(defaults: dict) -> pd.DataFrame:
+def build_load_levels(defaults: dict, params=None) -> pd.DataFrame:
+    """
+    Operating points of the running plant: load_levels powers evenly spaced
+    from partial to full load, with the efficiency read on the heat-rate
+    curve through the partial load point, the heat_rate_points and the full
+    load point (linear in between). Rows MIN_LOAD, LOAD_2, ..., FULL_LOAD.
+    Raises a ValueError for less than 2 levels.
+    """
+
+    params = st.session_state if params is None else params
+
+    power_partial = params.get("power_partial", defaults["power_partial"])
+    power_full = params.get("power_full", defaults["power_full"])
+    curve = sorted(
+        [
+            (
+                power_partial,
+                params.get("efficiency_partial", defaults["efficiency_partial"]),
+            ),
+            *map(tuple, params.get("heat_rate_points", defaults["heat_rate_points"])),
+            (power_full, params.get("efficiency_full", defaults["efficiency_full"])),
+        ]
+    )
+    powers, efficiencies = np.array(curve, dtype=float).T
+
+    n_levels = int(params.get("load_levels", defaults["load_levels"]))
+    if n_levels < 2:
+        raise ValueError(f"load_levels must be at least 2, not {n_levels}")
+    level_power = np.linspace(power_partial, power_full, n_levels)
+    labels = ["MIN_LOAD", *[f"LOAD_{k}" for k in range(2, n_levels)], "FULL_LOAD"]
+
     return pd.DataFrame(
+        {
+            "Power (MW)": level_power,
+            "Efficiency (%)": np.interp(level_power, powers, efficiencies),
+        },
+        index=labels,
+    )
+
+
+def add_load_level_rows(df: pd.DataFrame, levels: pd.Series) -> pd.DataFrame:
+    # One row per intermediate load level, with the same value in every column
+    for level, value in levels.iloc[1:-1].items():
+        df.loc[level] = value
+    return df
+
+
+def build_efficiency_df(defaults: dict, params=None) -> pd.DataFrame:
+    params = st.session_state if params is None else params
+
+    efficiency_df = pd.DataFrame(
         {
             "Hour 1": {
-                "RAMP_H": st.session_state.get(
+                "RAMP_H": params.get(
                     "efficiency_hour_1_hot", defaults["efficiency_full"] / 2.2
                 ),
-                "RAMP_W": st.session_state.get(
+                "RAMP_W": params.get(
                     "efficiency_hour_1_warm", defaults["efficiency_full"] / 3.5
                 ),
-                "RAMP_C": st.session_state.get(
+                "RAMP_C": params.get(
                     "efficiency_hour_1_cold", defaults["efficiency_full"] / 4.0
                 ),
-                "FULL_LOAD": st.session_state.get(
-                    "efficiency_full", defaults["efficiency_full"]
-                ),
-                "MIN_LOAD": st.session_state.get(
+                "FULL_LOAD": params.get("efficiency_full", defaults["efficiency_full"]),
+                "MIN_LOAD": params.get(
                     "efficiency_partial", defaults["efficiency_partial"]
                 ),
-                "STOP": st.session_state.get(
-                    "efficiency_stop", defaults["efficiency_stop"]
-                ),
+                "STOP": params.get("efficiency_stop", defaults["efficiency_stop"]),
             },
             "Hour 2": {
-                "RAMP_H": st.session_state.get(
+                "RAMP_H": params.get(
                     "efficiency_hour_2_hot", defaults["efficiency_full"]
                 ),
-                "RAMP_W": st.session_state.get(
+                "RAMP_W": params.get(
                     "efficiency_hour_2_warm", defaults["efficiency_full"] / 2.5
                 ),
-                "RAMP_C": st.session_state.get(
+                "RAMP_C": params.get(
                     "efficiency_hour_2_cold", defaults["efficiency_full"] / 3.0
                 ),
-                "FULL_LOAD": st.session_state.get(
-                    "efficiency_full", defaults["efficiency_full"]
-                ),
-                "MIN_LOAD": st.session_state.get(
+                "FULL_LOAD": params.get("efficiency_full", defaults["efficiency_full"]),
+                "MIN_LOAD": params.get(
                     "efficiency_partial", defaults["efficiency_partial"]
                 ),
                 "STOP": defaults["efficiency_stop"],
             },
             "Hour 3": {
-                "RAMP_H": st.session_state.get(
+                "RAMP_H": params.get(
                     "efficiency_hour_3_hot", defaults["efficiency_full"]
                 ),
-                "RAMP_W": st.session_state.get(
+                "RAMP_W": params.get(
                     "efficiency_hour_3_warm", defaults["efficiency_full"] / 1.8
                 ),
-                "RAMP_C": st.session_state.get(
+                "RAMP_C": params.get(
                     "efficiency_hour_3_cold", defaults["efficiency_full"] / 2.2
                 ),
-                "FULL_LOAD": st.session_state.get(
-                    "efficiency_full", defaults["efficiency_full"]
-                ),
-                "MIN_LOAD": st.session_state.get(
+                "FULL_LOAD": params.get("efficiency_full", defaults["efficiency_full"]),
+                "MIN_LOAD": params.get(
                     "efficiency_partial", defaults["efficiency_partial"]
                 ),
                 "STOP": defaults["efficiency_stop"],
             },
             "Hour 4": {
-                "RAMP_H": st.session_state.get(
-                    "efficiency_full", defaults["efficiency_full"]
-                ),
-                "RAMP_W": st.session_state.get(
+                "RAMP_H": params.get("efficiency_full", defaults["efficiency_full"]),
+                "RAMP_W": params.get(
                     "efficiency_hour_4_warm",
-                    st.session_state.get(
-                        "efficiency_full", defaults["efficiency_full"]
-                    ),
+                    params.get("efficiency_full", defaults["efficiency_full"]),
                 ),
-                "RAMP_C": st.session_state.get(
+                "RAMP_C": params.get(
                     "efficiency_hour_4_cold",
-                    st.session_state.get(
-                        "efficiency_full", defaults["efficiency_full"]
-                    ),
+                    params.get("efficiency_full", defaults["efficiency_full"]),
                 ),
-                "FULL_LOAD": st.session_state.get(
-                    "efficiency_full", defaults["efficiency_full"]
-                ),
-                "MIN_LOAD": st.session_state.get(
+                "FULL_LOAD": params.get("efficiency_full", defaults["efficiency_full"]),
+                "MIN_LOAD": params.get(
                     "efficiency_partial", defaults["efficiency_partial"]
                 ),
                 "STOP": defaults["efficiency_stop"],
@@ -116,89 +151,73 @@ def build_efficiency_df(defaults: dict) -> pd.DataFrame:
         }
     )
 
+    levels = build_load_levels(defaults, params)["Efficiency (%)"]
+    return add_load_level_rows(efficiency_df, levels)
 
-def build_power_df(defaults: dict) -> pd.DataFrame:
-    return pd.DataFrame(
+
+def build_power_df(defaults: dict, params=None) -> pd.DataFrame:
+    params = st.session_state if params is None else params
+
+    power_df = pd.DataFrame(
         {
             "Hour 1": {
-                "RAMP_H": st.session_state.get(
-                    "power_hour_1_hot", defaults["power_full"] / 2.0
-                ),
-                "RAMP_W": st.session_state.get(
-                    "power_hour_1_warm", defaults["power_full"] / 3.0
-                ),
-                "RAMP_C": st.session_state.get(
-                    "power_hour_1_cold", defaults["power_full"] / 4.0
-                ),
-                "FULL_LOAD": st.session_state.get("power_full", defaults["power_full"]),
-                "MIN_LOAD": st.session_state.get(
-                    "power_partial", defaults["power_partial"]
-                ),
-                "STOP": st.session_state.get("power_stop", defaults["power_stop"]),
+                "RAMP_H": params.get("power_hour_1_hot", defaults["power_full"] / 2.0),
+                "RAMP_W": params.get("power_hour_1_warm", defaults["power_full"] / 3.0),
+                "RAMP_C": params.get("power_hour_1_cold", defaults["power_full"] / 4.0),
+                "FULL_LOAD": params.get("power_full", defaults["power_full"]),
+                "MIN_LOAD": params.get("power_partial", defaults["power_partial"]),
+                "STOP": params.get("power_stop", defaults["power_stop"]),
             },
             "Hour 2": {
-                "RAMP_H": st.session_state.get(
-                    "power_hour_2_hot", defaults["power_full"]
-                ),
-                "RAMP_W": st.session_state.get(
-                    "power_hour_2_warm", defaults["power_full"] / 2.0
-                ),
-                "RAMP_C": st.session_state.get(
-                    "power_hour_2_cold", defaults["power_full"] / 2.5
-                ),
-                "FULL_LOAD": st.session_state.get("power_full", defaults["power_full"]),
-                "MIN_LOAD": st.session_state.get(
-                    "power_partial", defaults["power_partial"]
-                ),
+                "RAMP_H": params.get("power_hour_2_hot", defaults["power_full"]),
+                "RAMP_W": params.get("power_hour_2_warm", defaults["power_full"] / 2.0),
+                "RAMP_C": params.get("power_hour_2_cold", defaults["power_full"] / 2.5),
+                "FULL_LOAD": params.get("power_full", defaults["power_full"]),
+                "MIN_LOAD": params.get("power_partial", defaults["power_partial"]),
                 "STOP": defaults["power_stop"],
             },
             "Hour 3": {
-                "RAMP_H": st.session_state.get(
-                    "power_hour_3_hot", defaults["power_full"]
-                ),
-                "RAMP_W": st.session_state.get(
-                    "power_hour_3_warm", defaults["power_full"] / 1.5
-                ),
-                "RAMP_C": st.session_state.get(
-                    "power_hour_3_cold", defaults["power_full"] / 2.0
-                ),
-                "FULL_LOAD": st.session_state.get("power_full", defaults["power_full"]),
-                "MIN_LOAD": st.session_state.get(
-                    "power_partial", defaults["power_partial"]
-                ),
+                "RAMP_H": params.get("power_hour_3_hot", defaults["power_full"]),
+                "RAMP_W": params.get("power_hour_3_warm", defaults["power_full"] / 1.5),
+                "RAMP_C": params.get("power_hour_3_cold", defaults["power_full"] / 2.0),
+                "FULL_LOAD": params.get("power_full", defaults["power_full"]),
+                "MIN_LOAD": params.get("power_partial", defaults["power_partial"]),
                 "STOP": defaults["power_stop"],
             },
             "Hour 4": {
-                "RAMP_H": st.session_state.get("power_full", defaults["power_full"]),
-                "RAMP_W": st.session_state.get(
+                "RAMP_H": params.get("power_full", defaults["power_full"]),
+                "RAMP_W": params.get(
                     "power_hour_4_warm",
-                    st.session_state.get("power_full", defaults["power_full"]),
+                    params.get("power_full", defaults["power_full"]),
                 ),
-                "RAMP_C": st.session_state.get(
+                "RAMP_C": params.get(
                     "power_hour_4_cold",
-                    st.session_state.get("power_full", defaults["power_full"]),
-                ),
-                "FULL_LOAD": st.session_state.get("power_full", defaults["power_full"]),
-                "MIN_LOAD": st.session_state.get(
-                    "power_partial", defaults["power_partial"]
+                    params.get("power_full", defaults["power_full"]),
                 ),
+                "FULL_LOAD": params.get("power_full", defaults["power_full"]),
+                "MIN_LOAD": params.get("power_partial", defaults["power_partial"]),
                 "STOP": defaults["power_stop"],
             },
         }
     )
 
+    levels = build_load_levels(defaults, params)["Power (MW)"]
+    return add_load_level_rows(power_df, levels)
 
-def build_state_df(defaults: dict) -> pd.DataFrame:
-    return pd.DataFrame(
+
+def build_state_df(defaults: dict, params=None) -> pd.DataFrame:
+    params = st.session_state if params is None else params
+
+    state_df = pd.DataFrame(
         {
             "Use < XX off hours": {
-                "RAMP_H": st.session_state.get(
+                "RAMP_H": params.get(
                     "offline_limit_hours_hot", defaults["offline_limit_hours_hot"]
                 ),
-                "RAMP_W": st.session_state.get(
+                "RAMP_W": params.get(
                     "offline_limit_hours_warm", defaults["offline_limit_hours_warm"]
                 ),
-                "RAMP_C": st.session_state.get(
+                "RAMP_C": params.get(
                     "offline_limit_hours_cold", defaults["offline_limit_hours_cold"]
                 ),
                 "FULL_LOAD": 0,
@@ -206,15 +225,9 @@ def build_state_df(defaults: dict) -> pd.DataFrame:
                 "STOP": 0,
             },
             "Hours to Reach Full Load": {
-                "RAMP_H": st.session_state.get(
-                    "ramp_hours_hot", defaults["ramp_hours_hot"]
-                ),
-                "RAMP_W": st.session_state.get(
-                    "ramp_hours_warm", defaults["ramp_hours_warm"]
-                ),
-                "RAMP_C": st.session_state.get(
-                    "ramp_hours_cold", defaults["ramp_hours_cold"]
-                ),
+                "RAMP_H": params.get("ramp_hours_hot", defaults["ramp_hours_hot"]),
+                "RAMP_W": params.get("ramp_hours_warm", defaults["ramp_hours_warm"]),
+                "RAMP_C": params.get("ramp_hours_cold", defaults["ramp_hours_cold"]),
                 "FULL_LOAD": 0,
                 "MIN_LOAD": 0,
                 "STOP": 0,
@@ -222,36 +235,128 @@ def build_state_df(defaults: dict) -> pd.DataFrame:
         }
     )
 
+    levels = build_load_levels(defaults, params)
+    return add_load_level_rows(state_df, pd.Series(0, index=levels.index))
 
-def load_price_df(
-    csv_path: str, country: str, trading_point: str, year: int, month: int
-) -> pd.DataFrame:
+
+def resample_prices(price_df: pd.DataFrame, steps_per_hour=1) -> pd.DataFrame:
     """
-    Load and filter the unified energy dataset for a specific year and month.
-    Returns a DataFrame indexed by an incremental hour column.
+    Put a price series on a grid of steps_per_hour steps per hour: coarser
+    prices (e.g. hourly gas and CO2 in a 15-minute run) are held over the
+    steps they cover, finer ones are averaged over each step.
     """
 
-    countries_dic = {"Belgium": "BE", "France": "FR"}
+    step = pd.Timedelta(hours=1) / steps_per_hour
+    data_step = price_df["Datetime"].diff().median()
+    if pd.isna(data_step) or data_step == step:
+        return price_df
 
-    country_short = countries_dic[country]
+    indexed = price_df.sort_values("Datetime").set_index("Datetime")
+    if data_step < step:
+        resampled = indexed.resample(step).mean().dropna(how="all")
+    else:
+        grid = pd.date_range(
+            indexed.index[0], indexed.index[-1] + data_step - step, freq=step
+        )
+        resampled = indexed.reindex(grid, method="ffill")
 
-    price_df = pd.read_csv(csv_path)
-    price_df["Datetime"] = pd.to_datetime(price_df["Datetime"])
+    return resampled.rename_axis("Datetime").reset_index()
 
-    filtered = price_df[
-        (price_df["Datetime"].dt.year == year)
-        & (price_df["Datetime"].dt.month == month)
-    ][["Datetime", country_short, trading_point, "EUA Prices"]]
 
-    filtered = filtered.rename(
-        columns={
-            country_short: "power_price",
-            trading_point: "gas_price",
-            "EUA Prices": "co2_price",
-        }
+def format_price_df(
+    price_df: pd.DataFrame, country: str, trading_point: str, steps_per_hour=1
+) -> pd.DataFrame:
+    """
+    Select the power / gas / CO2 columns of a country and gas trading point
+    from rows of the unified dataset, on a grid of steps_per_hour steps per
+    hour and indexed by an incremental step column ("hour" for hourly steps).
+    """
+
+    country_short = COUNTRY_CODES[country]
+
+    # Columns are passed through without a copy (e.g. cached read-only prices)
+    filtered = pd.DataFrame(
+        {
+            "Datetime": price_df["Datetime"],
+            "power_price": price_df[country_short],
+            "gas_price": price_df[trading_point],
+            "co2_price": price_df["EUA Prices"],
+        },
+        copy=False,
     )
+    filtered = resample_prices(filtered, steps_per_hour)
 
-    filtered["hour"] = range(len(filtered))
-    filtered = filtered.set_index("hour")
+    index_name = "hour" if steps_per_hour == 1 else "step"
+    filtered.index = pd.RangeIndex(len(filtered), name=index_name)
 
     return filtered
+
+
+def load_price_range_df(
+    csv_path: str,
+    country: str,
+    trading_point: str,
+    start,
+    end,
+    steps_per_hour=1,
+) -> pd.DataFrame:
+    """
+    Load the prices from start (included) to end (excluded), over as many
+    months or years as needed, from the columnar store of the unified energy
+    dataset (utils.price_store), through the process-wide price cache: the
+    columns are read-only arrays shared by all sessions (copy() the frame
+    before writing into it). Hourly and quarter-hourly datasets are both put
+    on steps_per_hour steps per hour. Returns a DataFrame indexed by an
+    incremental step column.
+    """
+
+    columns = [COUNTRY_CODES[country], trading_point, "EUA Prices"]
+    price_df = pd.DataFrame(
+        cached_price_range(csv_path, start, end, columns), copy=False
+    )
+
+    return format_price_df(price_df, country, trading_point, steps_per_hour)
+
+
+def load_price_df(
+    csv_path: str,
+    country: str,
+    trading_point: str,
+    year: int,
+    month: int,
+    steps_per_hour=1,
+) -> pd.DataFrame:
+    # One month of prices (see load_price_range_df)
+    start = pd.Timestamp(year=year, month=month, day=1)
+    return load_price_range_df(
+        csv_path,
+        country,
+        trading_point,
+        start,
+        start + pd.offsets.MonthBegin(),
+        steps_per_hour,
+    )
+
+
+def price_dataset_options(csv_path: str) -> dict:
+    """
+    Countries, gas trading points, (year, month) periods and first and last
+    timestamps available in the dataset, read from the price store metadata
+    without loading any price. Raises a ValueError if it holds no price.
+    """
+
+    metadata = price_store_metadata(csv_path)
+    columns = metadata["columns"]
+    partitions = [metadata["partitions"][key] for key in sorted(metadata["partitions"])]
+    if not partitions:
+        raise ValueError(f"No prices in {csv_path}")
+
+    return {
+        "countries": [
+            country for country, code in COUNTRY_CODES.items() if code in columns
+        ],
+        "trading_points": [hub for hub in GAS_TRADING_POINTS if hub in columns],
+        "periods": store_periods(metadata),
+        "start": pd.Timestamp(partitions[0]["start"]),
+        "end": pd.Timestamp(partitions[-1]["end"]),
+    }
@@ -0,0 +1,134 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from utils.optimization import path_kpis, price_arrays
+from utils.sweep import build_plant_tables, daily_start_limit, solve_plant
+from utils.transition import build_state_graph, list_state_specs, topology_key
+
+# Read-only views on the shared price block and the timestamps, set once per
+# worker process
+_shared_block = None
+_worker_prices = None
+_worker_datetimes = None
+
+
+def share_price_arrays(power_price, gas_price, co2_price):
+    # One shared memory block holding the 3 x hour price matrix
+    prices = np.stack([power_price, gas_price, co2_price])
+    block = shared_memory.SharedMemory(create=True, size=prices.nbytes)
+    np.ndarray(prices.shape, dtype=prices.dtype, buffer=block.buf)[:] = prices
+    return block, prices.shape
+
+
+def _attach_prices(name, shape, datetimes):
+    global _shared_block, _worker_prices, _worker_datetimes
+    _worker_datetimes = datetimes
+    _shared_block = shared_memory.SharedMemory(name=name)
+    prices = np.ndarray(shape, dtype=float, buffer=_shared_block.buf)
+    prices.flags.writeable = False
+    _worker_prices = tuple(prices)
+
+
+def _solve_unit(graph, start_state, ef, max_starts):
+    states, net_revenue = solve_plant(
+        graph, *_worker_prices, start_state, ef, max_starts, _worker_datetimes
+    )
+
+    # Hourly net revenue of the unit along its optimal path
+    power_price, gas_price, co2_price = _worker_prices
+    hourly_net = graph.energy[states] * power_price - (
+        (graph.fixed_cost[states] + graph.variable_cost[states])
+        + gas_price * graph.gas[states]
+        + co2_price * (graph.gas * ef)[states]
+    )
+
+    return states, net_revenue, hourly_net
+
+
+def run_fleet(
+    defaults: dict,
+    plants: list,
+    prices_df: pd.DataFrame,
+    max_workers=None,
+) -> tuple:
+    """
+    Optimal dispatch of a portfolio of plants over the same price period.
+    Each plant is a dict of the parameters read by the build_*_df functions
+    (missing keys fall back to defaults), plus optional "name" and
+    "initial_state" entries. Units are solved in parallel on a process pool;
+    the price arrays are placed once in shared memory and mapped read-only by
+    every worker instead of being copied per task.
+
+    Returns (summary, schedules, portfolio): one KPI row per unit plus a
+    "Portfolio" total, a dict of per-unit hourly schedules, and the
+    aggregated hourly schedule.
+    """
+
+    names = [plant.get("name", f"Unit {i + 1}") for i, plant in enumerate(plants)]
+    start_states = [plant.get("initial_state", "OFF") for plant in plants]
+
+    graphs, efs, max_starts, specs_by_topology = [], [], [], {}
+    for plant in plants:
+        state_df, constraints_df, power_df, efficiency_df = build_plant_tables(
+            defaults, plant
+        )
+        key = topology_key(state_df, constraints_df)
+        if key not in specs_by_topology:
+            specs_by_topology[key] = list_state_specs(state_df, constraints_df)
+
+        graphs.append(
+            build_state_graph(
+                specs_by_topology[key], constraints_df, power_df, efficiency_df
+            )
+        )
+        efs.append(plant.get("emission_factor", defaults["emission_factor"]))
+        max_starts.append(daily_start_limit(constraints_df))
+
+    power_price, gas_price, co2_price = price_arrays(prices_df, prices_df.shape[0])
+    block, shape = share_price_arrays(power_price, gas_price, co2_price)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_attach_prices,
+            initargs=(block.name, shape, prices_df["Datetime"].to_numpy()),
+        ) as pool:
+            results = list(pool.map(_solve_unit, graphs, start_states, efs, max_starts))
+    finally:
+        block.close()
+        block.unlink()
+
+    schedules = {}
+    summary = []
+    for name, graph, (states, net_revenue, hourly_net) in zip(names, graphs, results):
+        schedules[name] = pd.DataFrame(
+            {
+                "Datetime": prices_df["Datetime"].to_numpy(),
+                "Path": graph.labels[states],
+                "load": graph.load[states],
+                "net_revenue": hourly_net,
+            },
+            index=prices_df.index,
+        )
+        summary.append(path_kpis(graph, states, net_revenue).assign(unit=name))
+
+    portfolio = pd.DataFrame(
+        {
+            "Datetime": prices_df["Datetime"].to_numpy(),
+            "load": sum(schedule["load"] for schedule in schedules.values()),
+            "net_revenue": sum(
+                schedule["net_revenue"] for schedule in schedules.values()
+            ),
+        },
+        index=prices_df.index,
+    )
+    portfolio["cumulative_net"] = portfolio["net_revenue"].cumsum()
+
+    summary = pd.concat(summary).set_index("unit")
+    summary.loc["Portfolio"] = summary.sum()
+    summary.loc["Portfolio", "revenue_per_MWh"] = (
+        summary.loc["Portfolio", "net_revenue"] / summary.loc["Portfolio", "production"]
+    )
+
+    return summary, schedules, portfolio
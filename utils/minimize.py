@@ -0,0 +1,241 @@
+from collections import deque
+
+import numpy as np
+from utils.optimization import action_segments, backward_step, compute_profit_matrix
+from utils.state_graph import StateGraph
+
+
+def _row_classes(rows) -> np.ndarray:
+    # Class of each row (equal rows share one), numbered in order of first row
+    _, first, inverse = np.unique(rows, axis=0, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first)] = np.arange(len(first))
+    return rank[inverse.reshape(-1)]
+
+
+def _subgraph(graph, rows, successors) -> StateGraph:
+    return StateGraph(
+        labels=graph.labels[rows],
+        load=graph.load[rows],
+        efficiency=graph.efficiency[rows],
+        fixed_cost=graph.fixed_cost[rows],
+        variable_cost=graph.variable_cost[rows],
+        gas=graph.gas[rows],
+        successors=successors,
+        step_hours=graph.step_hours,
+    )
+
+
+def equivalent_states(graph, extra=None) -> np.ndarray:
+    """
+    Coarsest partition of the states into behaviorally equivalent classes
+    (bisimulation): same attributes (and extra columns, if any) and, under
+    every action, successors in the same class. The attribute classes are
+    refined until stable.
+
+    Returns the class of each state, numbered in order of first member.
+    """
+
+    attributes = [
+        graph.load,
+        graph.efficiency,
+        graph.fixed_cost,
+        graph.variable_cost,
+        graph.gas,
+        graph.start_mask,
+    ]
+    classes = _row_classes(
+        np.column_stack(attributes + ([] if extra is None else [extra]))
+    )
+
+    while True:
+        following = np.where(graph.successors >= 0, classes[graph.successors], -1)
+        refined = _row_classes(np.column_stack([classes, following]))
+        if refined.max() == classes.max():
+            return classes
+        classes = refined
+
+
+def counter_runs(graph, start) -> list:
+    """
+    Runs s_1 -> s_2 -> ... -> s_L of idle states (no load, gas or cost, e.g.
+    the OFF_k counters) where every state moves to the next one with action
+    0 and has at most one other move, the same for the whole run (the ramp
+    the plant would start). s_2 .. s_L are only entered from the previous
+    state of the run and are not the start state.
+
+    Returns the states of each run of at least 2 states.
+    """
+
+    successors = graph.successors
+    wait = successors[:, 0]
+    moves = successors != wait[:, None]
+    exit_action = np.argmax(moves, axis=1)
+    exit_state = np.where(
+        exit_action > 0, successors[np.arange(graph.n_states), exit_action], -1
+    )
+
+    chainable = (
+        (graph.load == 0)
+        & (graph.gas == 0)
+        & (graph.fixed_cost == 0)
+        & (graph.variable_cost == 0)
+        & (successors >= 0).all(axis=1)
+        & (~moves | (successors == exit_state[:, None])).all(axis=1)
+    )
+    n_predecessors = np.bincount(graph.successor_csr()[1], minlength=graph.n_states)
+
+    linked = np.zeros(graph.n_states, dtype=bool)
+    for state in np.flatnonzero(chainable):
+        following = wait[state]
+        linked[following] = (
+            following != state
+            and following != start
+            and chainable[following]
+            and n_predecessors[following] == 1
+            and exit_action[following] == exit_action[state]
+            and exit_state[following] == exit_state[state]
+        )
+
+    runs = []
+    for head in np.flatnonzero(chainable & ~linked):
+        states = [head]
+        while linked[wait[states[-1]]]:
+            states.append(wait[states[-1]])
+        if len(states) > 1:
+            runs.append(np.array(states))
+
+    return runs
+
+
+def minimize_state_graph(graph, start) -> tuple:
+    """
+    Smaller graph with the same optimal values, in two stages:
+
+    - each counter run is replaced by its first state, whose row points to
+      the state after the run where the run waits and to the run exit
+      elsewhere; run_length (0 for other states) tells how long it waits;
+    - equivalent states of that graph are merged (equivalent_states, with
+      run_length as an extra attribute), e.g. OFF_{range_off} and OFF.
+
+    Returns (reduced, run_length, node): the reduced graph, the run length
+    of its states and the reduced state of each state of graph (-1 for the
+    inner states of the runs).
+    """
+
+    runs = counter_runs(graph, start)
+    inner = np.zeros(graph.n_states, dtype=bool)
+    length = np.zeros(graph.n_states, dtype=np.int64)
+    successors = graph.successors.copy()
+    for states in runs:
+        inner[states[1:]] = True
+        length[states[0]] = len(states)
+        first = successors[states[0]]
+        successors[states[0]] = np.where(
+            first == first[0], graph.successors[states[-1], 0], first
+        )
+
+    kept = np.flatnonzero(~inner)
+    position = np.full(graph.n_states + 1, -1)
+    position[kept] = np.arange(len(kept))
+    collapsed = _subgraph(graph, kept, position[successors[kept]])
+
+    classes = equivalent_states(collapsed, length[kept])
+    members = np.unique(classes, return_index=True)[1]
+    following = collapsed.successors[members]
+    reduced = _subgraph(
+        collapsed, members, np.where(following >= 0, classes[following], -1)
+    )
+
+    node = np.full(graph.n_states, -1)
+    node[kept] = classes
+    return reduced, length[kept][members], node
+
+
+def solve_minimized(graph, power_price, gas_price, co2_price, start_state, ef=0.18):
+    """
+    Optimal path over the whole price horizon (zero terminal values) solved
+    on minimize_state_graph, with the same path and value as solve_bellman
+    and extract_path on the full graph. Waiting in a run is free, so its
+    value at hour t is the best of the exit values over the next L hours and
+    of the state after the run at hour t + L: a monotone queue keeps that
+    sliding max in O(1) per hour and the solve time does not grow with the
+    offline limits or min hours off. The path is mapped back by replaying
+    the chosen actions on graph.
+
+    Returns (states, value): the state index path in graph and the optimal
+    net revenue.
+    """
+
+    start = graph.index_of(start_state)
+    reduced, run_length, node = minimize_state_graph(graph, start)
+    window = len(power_price)
+    successors = reduced.successors
+
+    # Run states: length, exit action (None without exit), exit, state after
+    runs = {}
+    for head in np.flatnonzero(run_length):
+        moves = np.flatnonzero(successors[head] != successors[head, 0])
+        exit_action = int(moves[0]) if moves.size else None
+        exit_node = None if exit_action is None else successors[head, exit_action]
+        runs[head] = (run_length[head], exit_action, exit_node, successors[head, 0])
+
+    profit = compute_profit_matrix(reduced, power_price, gas_price, co2_price, ef)
+    segments = action_segments(reduced)
+
+    values = np.zeros((window + 1, reduced.n_states))
+    actions = np.empty((window, reduced.n_states), dtype=np.int8)
+    queues = {head: deque() for head in runs}
+    for t in reversed(range(window)):
+        values[t], actions[t] = backward_step(
+            profit[t], values[t + 1], successors, segments
+        )
+        for head, (length, _, exit_node, after) in runs.items():
+            value = values[min(t + length, window), after]
+            if exit_node is not None:
+                # (hour, exit value) pairs, values decreasing to the left
+                queue = queues[head]
+                exit_value = values[t + 1, exit_node]
+                while queue and queue[0][1] <= exit_value:
+                    queue.popleft()
+                queue.appendleft((t + 1, exit_value))
+                while queue[-1][0] > t + length:
+                    queue.pop()
+                value = max(value, queue[-1][1])
+            values[t, head] = value
+
+    # Forward pass: a run waits as long as it is optimal, like the full graph
+    # where waiting is the first action and wins ties
+    path_actions = np.empty(window, dtype=np.int64)
+    current, t = node[start], 0
+    while t < window:
+        if current not in runs:
+            action = actions[t, current]
+            if action < 0:
+                raise ValueError(
+                    f"No feasible transition from state {reduced.labels[current]} "
+                    f"at hour {t}"
+                )
+            path_actions[t] = action
+            current = successors[current, action]
+            t += 1
+            continue
+
+        length, exit_action, exit_node, after = runs[current]
+        steps = min(length, window - t)
+        waits, following = steps, after
+        if values[min(t + length, window), after] != values[t, current]:
+            exits = values[t + 1 : t + steps + 1, exit_node]
+            waits = np.flatnonzero(exits == values[t, current])[-1]
+            following = exit_node
+            path_actions[t + waits] = exit_action
+        path_actions[t : t + waits] = 0
+        current, t = following, t + min(waits + 1, steps)
+
+    state = start
+    states = np.empty(window, dtype=np.int64)
+    for t in range(window):
+        states[t] = state
+        state = graph.successors[state, path_actions[t]]
+
+    return states, values[0, node[start]]
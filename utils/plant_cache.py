@@ -0,0 +1,89 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import pandas as pd
+import streamlit as st
+from utils.state_graph import StateGraph
+from utils.sweep import build_plant_tables
+from utils.transition import build_state_graph, list_state_specs
+
+# Plant models kept across reruns, least recently used first
+MAX_PLANT_MODELS = 8
+_models = OrderedDict()
+_models_lock = threading.Lock()
+
+
+@dataclass(eq=False)
+class PlantModel:
+    """
+    Everything built from the plant parameters: the four input tables, the
+    state graph and arrays derived from it (see derive). Cached models are
+    shared between reruns and must not be modified in place.
+    """
+
+    state_df: pd.DataFrame
+    constraints_df: pd.DataFrame
+    power_df: pd.DataFrame
+    efficiency_df: pd.DataFrame
+    graph: StateGraph
+    derived: dict = field(default_factory=dict)
+
+    def derive(self, key, build):
+        # build(model) is only called the first time key is asked for
+        if key not in self.derived:
+            self.derived[key] = build(self)
+        return self.derived[key]
+
+    @property
+    def transition_df(self) -> pd.DataFrame:
+        return self.derive("transition_df", lambda model: model.graph.to_dataframe())
+
+
+def plant_fingerprint(defaults: dict, params, steps_per_hour=1) -> str:
+    # Stable hash of every plant parameter, missing ones take their default
+    values = [(key, params.get(key, defaults[key])) for key in sorted(defaults)]
+    return hashlib.sha256(repr((values, steps_per_hour)).encode()).hexdigest()
+
+
+def build_plant_model(defaults: dict, params, steps_per_hour=1) -> PlantModel:
+    state_df, constraints_df, power_df, efficiency_df = build_plant_tables(
+        defaults, params
+    )
+    graph = build_state_graph(
+        list_state_specs(state_df, constraints_df, steps_per_hour),
+        constraints_df,
+        power_df,
+        efficiency_df,
+        steps_per_hour,
+    )
+    return PlantModel(state_df, constraints_df, power_df, efficiency_df, graph)
+
+
+def get_plant_model(
+    defaults: dict, params=None, steps_per_hour=1, max_models=MAX_PLANT_MODELS
+) -> PlantModel:
+    """
+    Plant model for the current parameters (st.session_state by default),
+    built only if no model with the same fingerprint is cached. At most
+    max_models models are kept, the least recently used is evicted first.
+    """
+
+    params = st.session_state if params is None else params
+    key = plant_fingerprint(defaults, params, steps_per_hour)
+
+    with _models_lock:
+        if key in _models:
+            _models.move_to_end(key)
+            return _models[key]
+
+    model = build_plant_model(defaults, params, steps_per_hour)
+
+    with _models_lock:
+        model = _models.setdefault(key, model)
+        _models.move_to_end(key)
+        while len(_models) > max_models:
+            _models.popitem(last=False)
+
+    return model
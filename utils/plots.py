@@ -12,8 +12,14 @@ def plot_dispatch_chart(merged_df):
     y = merged_df["CSS"].astype(float).to_numpy()
     mask = y > 0
 
-    axs[0].bar(
-        x, merged_df["load"], width=0.03, label="Optimal Load (MW)", color="#ADD8E6"
+    # One step area rather than a bar per step, fast over long horizons
+    axs[0].fill_between(
+        x,
+        0,
+        merged_df["load"].to_numpy(dtype=float),
+        step="post",
+        label="Optimal Load (MW)",
+        color="#ADD8E6",
     )
     axs[0].set_ylabel("Load (MW)", color="black")
     axs[0].tick_params(axis="y", labelcolor="black")
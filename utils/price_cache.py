@@ -0,0 +1,127 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from utils.price_store import (
+    check_columns,
+    concat_ranges,
+    overlapping_partitions,
+    read_partition,
+    read_with_metadata,
+    slice_range,
+    store_path,
+)
+
+# Bytes of prices kept for all the sessions of the process
+PRICE_CACHE_BYTES = 256 * 2**20
+
+_partitions = OrderedDict()
+_partitions_lock = threading.Lock()
+_budget = PRICE_CACHE_BYTES
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+
+
+def _read_only(arrays: dict) -> dict:
+    for values in arrays.values():
+        values.flags.writeable = False
+    return arrays
+
+
+def _nbytes(arrays: dict) -> int:
+    return sum(values.nbytes for values in arrays.values())
+
+
+def _evict(budget: int):
+    # Least recently used partitions first, called with the lock held
+    while _partitions and _stats["bytes"] > budget:
+        _, arrays = _partitions.popitem(last=False)
+        _stats["bytes"] -= _nbytes(arrays)
+        _stats["evictions"] += 1
+
+
+def set_price_cache_budget(max_bytes: int):
+    # Memory budget of the cache, partitions over it are evicted right away
+    global _budget
+    with _partitions_lock:
+        _budget = max_bytes
+        _evict(_budget)
+
+
+def price_cache_stats() -> dict:
+    # Hits, misses and evictions since the start, entries and bytes held
+    with _partitions_lock:
+        return {**_stats, "entries": len(_partitions), "budget": _budget}
+
+
+def clear_price_cache():
+    with _partitions_lock:
+        _partitions.clear()
+        _stats.update(hits=0, misses=0, evictions=0, bytes=0)
+
+
+def cached_partition(csv_path: str, metadata: dict, key: str, columns) -> dict:
+    """
+    Datetime and columns of a price partition, loaded once per process and
+    shared by every session as read-only arrays. Entries are keyed by the
+    file fingerprint (store and partition revision), the columns (country
+    and hub) and the month, so ingested prices never hit a stale entry.
+    """
+
+    columns = tuple(columns)
+    fingerprint = (str(store_path(csv_path)), metadata["partitions"][key]["revision"])
+    entry = (fingerprint, columns, key)
+
+    with _partitions_lock:
+        if entry in _partitions:
+            _partitions.move_to_end(entry)
+            _stats["hits"] += 1
+            return _partitions[entry]
+        _stats["misses"] += 1
+
+    arrays = _read_only(
+        {
+            column: np.array(values)
+            for column, values in read_partition(
+                csv_path, metadata, key, columns
+            ).items()
+        }
+    )
+
+    with _partitions_lock:
+        if entry not in _partitions:
+            # Older revisions of the partition will not be asked for again
+            for stale in [
+                cached
+                for cached in _partitions
+                if cached[0][0] == fingerprint[0] and cached[1:] == entry[1:]
+            ]:
+                _stats["bytes"] -= _nbytes(_partitions.pop(stale))
+            _partitions[entry] = arrays
+            _stats["bytes"] += _nbytes(arrays)
+        _partitions.move_to_end(entry)
+        arrays = _partitions[entry]
+        _evict(_budget)
+
+    return arrays
+
+
+def cached_price_range(csv_path: str, start, end, columns) -> dict:
+    """
+    Read-only Datetime and column arrays from start (included) to end
+    (excluded), sliced from the cached partitions by binary search. A range
+    within one month is a view of the cache, nothing is copied.
+    """
+
+    columns = list(columns)
+
+    def read(metadata):
+        check_columns(metadata, columns)
+        pieces = [
+            slice_range(cached_partition(csv_path, metadata, key, columns), start, end)
+            for key in overlapping_partitions(metadata, start, end)
+        ]
+        if len(pieces) == 1:
+            return pieces[0]
+        return _read_only(concat_ranges(pieces, columns))
+
+    return read_with_metadata(csv_path, read)
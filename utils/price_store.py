@@ -0,0 +1,468 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: ingestions are only serialized per process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the layout of the store changes, older stores are rebuilt
+STORE_VERSION = 3
+
+# Bytes hashed at a time when checking that a source was only appended to
+CHECKSUM_CHUNK = 2**20
+
+# Seconds between two polls of the price watcher
+POLL_SECONDS = 60
+
+# Seconds a replaced partition revision is kept on disk for the readers
+# still holding the metadata that points to it
+RETAIN_SECONDS = 600
+
+_ingest_lock = threading.Lock()
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def store_path(csv_path: str) -> Path:
+    # data/unified_energy_dataset.csv -> data/unified_energy_dataset.store
+    return Path(csv_path).with_suffix(".store")
+
+
+def source_files(csv_path: str) -> list:
+    # The CSV, then the files dropped next to it with the same name prefix
+    # (e.g. unified_energy_dataset_2025-07.csv), in name order
+    main = Path(csv_path)
+    added = sorted(path for path in main.parent.glob(f"{main.stem}*.csv"))
+    return [main, *(path for path in added if path != main)]
+
+
+def partition_key(year: int, month: int) -> str:
+    return f"{year:04d}-{month:02d}"
+
+
+def _revision_path(key: str, revision: int) -> str:
+    # Directory of a partition revision, relative to the store
+    year, month = key.split("-")
+    return f"{year}/{month}/{revision}"
+
+
+def _partition_dir(store: Path, key: str, revision: int) -> Path:
+    return store / _revision_path(key, revision)
+
+
+@contextmanager
+def _store_lock(csv_path: str):
+    # One ingestion at a time per store: a thread lock within the process and
+    # an exclusive lock on a file next to the store across processes
+    with _ingest_lock:
+        if fcntl is None:
+            yield
+            return
+        store = store_path(csv_path)
+        with open(store.with_name(f"{store.name}.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _checksum(path: Path, offset: int) -> str:
+    # Hash of the bytes before offset, read by chunks
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while offset > 0:
+            chunk = file.read(min(offset, CHECKSUM_CHUNK))
+            if not chunk:
+                break
+            digest.update(chunk)
+            offset -= len(chunk)
+    return digest.hexdigest()
+
+
+def read_source(path: Path, offset=0) -> tuple:
+    """
+    Rows of a source CSV from byte offset on (0 for the whole file) to its
+    end. Returns (rows, end offset): the offset of the end of its last line
+    break, so a last line without one (e.g. still being written) is read
+    again by the next update, which keeps its latest value.
+    """
+
+    with open(path, "rb") as file:
+        header = file.readline()
+        start = max(offset, len(header))
+        file.seek(start)
+        data = file.read()
+    end = start + data.rfind(b"\n") + 1
+
+    rows = pd.read_csv(io.BytesIO(header + data))
+    rows["Datetime"] = pd.to_datetime(rows["Datetime"])
+    return rows, end
+
+
+def _source_state(path: Path, end: int) -> dict:
+    stat = os.stat(path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "offset": end,
+        "checksum": _checksum(path, end),
+    }
+
+
+def write_partition(store: Path, key: str, rows: pd.DataFrame) -> dict:
+    """
+    Write the rows of a month in a new revision directory of its partition,
+    one .npy file per column (Datetime as datetime64[ns]). The partition
+    only switches to it when the metadata is written.
+    """
+
+    revision = time.time_ns()
+    directory = _partition_dir(store, key, revision)
+    directory.mkdir(parents=True)
+    np.save(directory / "Datetime.npy", rows["Datetime"].to_numpy("datetime64[ns]"))
+    for column in rows.columns.drop("Datetime"):
+        np.save(directory / f"{column}.npy", rows[column].to_numpy(dtype=float))
+
+    return {
+        "rows": len(rows),
+        "start": rows["Datetime"].iloc[0].isoformat(),
+        "end": rows["Datetime"].iloc[-1].isoformat(),
+        "revision": revision,
+    }
+
+
+def write_metadata(store: Path, metadata: dict):
+    # Written last and atomically, a store without metadata is incomplete
+    temporary = store / "metadata.json.tmp"
+    temporary.write_text(json.dumps(metadata, indent=1))
+    os.replace(temporary, store / "metadata.json")
+
+
+def read_metadata(store: Path):
+    try:
+        return json.loads((store / "metadata.json").read_text())
+    except FileNotFoundError:
+        return None
+
+
+def _by_month(rows: pd.DataFrame):
+    # Rows sorted by Datetime, a timestamp given twice keeps its last value
+    rows = rows.drop_duplicates("Datetime", keep="last").sort_values(
+        "Datetime", kind="stable"
+    )
+    periods = [rows["Datetime"].dt.year, rows["Datetime"].dt.month]
+    for (year, month), month_rows in rows.groupby(periods, sort=True):
+        yield partition_key(year, month), month_rows
+
+
+def build_price_store(csv_path: str, retired=None) -> dict:
+    """
+    Ingestion of the unified CSV (and the source_files next to it) into a
+    columnar store: one directory per month (YYYY/MM/<revision>) holding one
+    typed .npy file per column, rows sorted by Datetime, and a metadata.json
+    index of the columns, the partitions (rows, first and last timestamp,
+    revision), how far each source file was read and the retired revisions
+    still on disk. Every partition gets a new revision, the revisions of a
+    previous build are passed in retired. Returns the metadata.
+    """
+
+    sources, frames = {}, []
+    for path in source_files(csv_path):
+        rows, end = read_source(path)
+        sources[path.name] = _source_state(path, end)
+        frames.append(rows)
+    price_df = pd.concat(frames, ignore_index=True)
+
+    store = store_path(csv_path)
+    store.mkdir(parents=True, exist_ok=True)
+    metadata = {
+        "version": STORE_VERSION,
+        "sources": sources,
+        "columns": list(price_df.columns.drop("Datetime")),
+        "partitions": {
+            key: write_partition(store, key, rows) for key, rows in _by_month(price_df)
+        },
+        "retired": retired or {},
+    }
+    write_metadata(store, metadata)
+    return metadata
+
+
+def _read_partition_rows(store: Path, key: str, partition: dict, columns):
+    directory = _partition_dir(store, key, partition["revision"])
+    return pd.DataFrame(
+        {
+            column: np.load(directory / f"{column}.npy", mmap_mode="r")
+            for column in ["Datetime", *columns]
+        }
+    )
+
+
+def _retire(retired: dict, key: str, partition: dict) -> dict:
+    # Revision replaced now, removed RETAIN_SECONDS later by _purge_retired
+    return {**retired, _revision_path(key, partition["revision"]): time.time()}
+
+
+def _purge_retired(store: Path, retired: dict) -> dict:
+    # Remove the revisions retired long enough ago, returns the others
+    kept = {}
+    for path, since in retired.items():
+        if time.time() - since < RETAIN_SECONDS:
+            kept[path] = since
+        else:
+            shutil.rmtree(store / path, ignore_errors=True)
+    return kept
+
+
+def _read_updates(csv_path: str, metadata: dict):
+    """
+    (sources, frames) of the source files of csv_path: their new state and
+    the rows appended to them or of new files. None when a source was
+    edited, truncated or removed and the store must be rebuilt: a known
+    source changed without growing, or the bytes it had are not unchanged.
+    """
+
+    paths = source_files(csv_path)
+    if set(metadata["sources"]) - {path.name for path in paths}:
+        return None
+
+    sources, frames = {}, []
+    for path in paths:
+        known = metadata["sources"].get(path.name)
+        stat = os.stat(path)
+        if known is not None and (stat.st_size, stat.st_mtime_ns) == (
+            known["size"],
+            known["mtime_ns"],
+        ):
+            sources[path.name] = known
+            continue
+
+        offset = 0 if known is None else known["offset"]
+        if known is not None and (
+            stat.st_size <= known["size"]
+            or _checksum(path, offset) != known["checksum"]
+        ):
+            return None
+
+        rows, end = read_source(path, offset)
+        sources[path.name] = _source_state(path, end)
+        frames.append(rows)
+
+    return sources, frames
+
+
+def ingest_price_updates(csv_path: str) -> tuple:
+    """
+    Bring the store of csv_path up to date with its sources, reading only
+    what changed (run by the price watcher, or to refresh on demand):
+
+    - rows appended to a source (it grew and the bytes before the previous
+      end are unchanged) and new source files are parsed alone, then merged
+      into the partitions of their months, which get a new revision;
+    - a source edited in place, truncated or removed triggers a full
+      rebuild, a store of another version is rebuilt from scratch.
+
+    Replaced revisions stay on disk for RETAIN_SECONDS, so readers holding
+    the previous metadata can finish. Ingestions of the same store are
+    serialized across threads and processes.
+
+    Returns (metadata, changed): changed lists the keys ("YYYY-MM") of the
+    partitions written, e.g. to invalidate what was computed from them.
+    """
+
+    with _store_lock(csv_path):
+        store = store_path(csv_path)
+        metadata = read_metadata(store)
+        if metadata is None or metadata.get("version") != STORE_VERSION:
+            shutil.rmtree(store, ignore_errors=True)
+            metadata = build_price_store(csv_path)
+            return metadata, sorted(metadata["partitions"])
+
+        retired = _purge_retired(store, metadata["retired"])
+        updates = _read_updates(csv_path, metadata)
+        if updates is None:
+            for key, partition in metadata["partitions"].items():
+                retired = _retire(retired, key, partition)
+            metadata = build_price_store(csv_path, retired)
+            return metadata, sorted(metadata["partitions"])
+
+        sources, frames = updates
+        if sources == metadata["sources"] and retired == metadata["retired"]:
+            return metadata, []
+
+        # Merge the new rows into their months
+        partitions = dict(metadata["partitions"])
+        columns = metadata["columns"]
+        changed = []
+        new_rows = pd.concat(frames, ignore_index=True) if frames else None
+        for key, rows in [] if new_rows is None else _by_month(new_rows):
+            rows = rows.reindex(columns=["Datetime", *columns])
+            if key in partitions:
+                previous = _read_partition_rows(store, key, partitions[key], columns)
+                _, rows = next(
+                    _by_month(pd.concat([previous, rows], ignore_index=True))
+                )
+                retired = _retire(retired, key, partitions[key])
+            partitions[key] = write_partition(store, key, rows)
+            changed.append(key)
+
+        metadata = {
+            **metadata,
+            "sources": sources,
+            "partitions": partitions,
+            "retired": retired,
+        }
+        write_metadata(store, metadata)
+
+        return metadata, changed
+
+
+def price_store_metadata(csv_path: str) -> dict:
+    """
+    Metadata of the store of csv_path as last ingested, read from its
+    metadata.json: new prices are ingested by the price watcher or an
+    explicit ingest_price_updates. The store is only built here when it is
+    missing or of another version.
+    """
+
+    metadata = read_metadata(store_path(csv_path))
+    if metadata is None or metadata.get("version") != STORE_VERSION:
+        metadata = ingest_price_updates(csv_path)[0]
+    return metadata
+
+
+def read_with_metadata(csv_path: str, read):
+    """
+    read(metadata) on the current metadata of the store of csv_path, tried
+    once more on fresh metadata if a revision it points to was removed in
+    the meantime (read by a reader holding it for longer than RETAIN_SECONDS).
+    """
+
+    try:
+        return read(price_store_metadata(csv_path))
+    except FileNotFoundError:
+        return read(price_store_metadata(csv_path))
+
+
+def store_periods(metadata: dict) -> list:
+    # Sorted (year, month) pairs of the partitions
+    return [tuple(map(int, key.split("-"))) for key in sorted(metadata["partitions"])]
+
+
+def partition_revisions(metadata: dict) -> dict:
+    # (year, month) -> revision of its partition, changes when its rows do
+    return {
+        tuple(map(int, key.split("-"))): partition["revision"]
+        for key, partition in metadata["partitions"].items()
+    }
+
+
+def check_columns(metadata: dict, columns: list):
+    missing = set(columns) - set(metadata["columns"])
+    if missing:
+        raise KeyError(f"Columns not in the price dataset: {sorted(missing)}")
+
+
+def overlapping_partitions(metadata: dict, start, end) -> list:
+    # Keys of the partitions with rows from start (included) to end
+    # (excluded), in time order, from their first and last timestamps
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    return [
+        key
+        for key, partition in sorted(metadata["partitions"].items())
+        if pd.Timestamp(partition["end"]) >= start
+        and pd.Timestamp(partition["start"]) < end
+    ]
+
+
+def read_partition(csv_path: str, metadata: dict, key: str, columns) -> dict:
+    # Memory-mapped Datetime and columns of a partition of the metadata
+    directory = _partition_dir(
+        store_path(csv_path), key, metadata["partitions"][key]["revision"]
+    )
+    return {
+        column: np.load(directory / f"{column}.npy", mmap_mode="r")
+        for column in ["Datetime", *columns]
+    }
+
+
+def slice_range(arrays: dict, start, end) -> dict:
+    # Rows of sorted arrays with start <= Datetime < end, by binary search
+    bounds = np.array([pd.Timestamp(start), pd.Timestamp(end)], "datetime64[ns]")
+    first, last = np.searchsorted(arrays["Datetime"], bounds)
+    return {column: values[first:last] for column, values in arrays.items()}
+
+
+def concat_ranges(pieces: list, columns) -> dict:
+    # Arrays of consecutive slice_range pieces joined, empty without pieces
+    if not pieces:
+        return {"Datetime": np.empty(0, "datetime64[ns]")} | {
+            column: np.empty(0) for column in columns
+        }
+    return {
+        column: np.concatenate([piece[column] for piece in pieces])
+        for column in ["Datetime", *columns]
+    }
+
+
+def read_price_range(csv_path: str, start, end, columns=None) -> pd.DataFrame:
+    """
+    Rows with start <= Datetime < end, with the Datetime and the given
+    columns (all of them by default), over any number of months. Only the
+    partitions overlapping the range are memory-mapped and, their rows being
+    sorted, the range is located in each by binary search on Datetime.
+    """
+
+    def read(metadata):
+        selected = metadata["columns"] if columns is None else list(columns)
+        check_columns(metadata, selected)
+        pieces = [
+            slice_range(read_partition(csv_path, metadata, key, selected), start, end)
+            for key in overlapping_partitions(metadata, start, end)
+        ]
+        return pd.DataFrame(concat_ranges(pieces, selected))
+
+    return read_with_metadata(csv_path, read)
+
+
+def start_price_watcher(csv_path: str, interval=POLL_SECONDS) -> threading.Thread:
+    """
+    Ingest the updates of the sources of csv_path now and every interval
+    seconds in a daemon thread, so new prices are in the store before a page
+    asks for them. One watcher per CSV and process, later calls return it.
+    """
+
+    def poll():
+        while True:
+            try:
+                ingest_price_updates(csv_path)
+            except Exception:
+                # E.g. a file being written or a malformed file dropped next
+                # to the dataset, retried at the next poll
+                logger.exception("Price ingestion of %s failed", csv_path)
+            time.sleep(interval)
+
+    with _watchers_lock:
+        watcher = _watchers.get(csv_path)
+        if watcher is None or not watcher.is_alive():
+            watcher = threading.Thread(
+                target=poll, name=f"price-watcher {csv_path}", daemon=True
+            )
+            watcher.start()
+            _watchers[csv_path] = watcher
+        return watcher
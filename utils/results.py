@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+PERIODS = {"Day": "D", "Week": "W", "Month": "M"}
+
+
+def dispatch_results(graph, prices_df, states, efficiency, ef=0.18) -> pd.DataFrame:
+    """
+    Hourly results of a state index path, sorted by Datetime: the prices, the
+    state as an integer code and a categorical Path label, its attributes,
+    and the CSS (at the given efficiency), fuel cost and revenue streams with
+    their cumulative sums. Everything is computed on arrays in one pass.
+    """
+
+    order = np.argsort(prices_df["Datetime"].to_numpy(), kind="stable")
+    states = np.asarray(states)[order]
+    results = prices_df.iloc[order].reset_index(drop=True)
+
+    power_price = results["power_price"].to_numpy(dtype=float)
+    gas_price = results["gas_price"].to_numpy(dtype=float)
+    co2_price = results["co2_price"].to_numpy(dtype=float)
+    load = graph.load[states]
+    energy = graph.energy[states]
+
+    results["Path"] = pd.Categorical.from_codes(states, categories=graph.labels)
+    results["state"] = states.astype(np.min_scalar_type(graph.n_states))
+    results["load"] = load
+    results["efficiency"] = graph.efficiency[states]
+    results["fixed_cost"] = graph.fixed_cost[states]
+    results["variable_cost"] = graph.variable_cost[states]
+    results["gas"] = graph.gas[states]
+    results["energy"] = energy
+    results["start"] = graph.start_mask[states]
+
+    fuel_price = gas_price / efficiency + co2_price * ef
+    fuel_cost = energy * fuel_price
+    gross_revenue = power_price * energy
+    revenue_after_fuel = gross_revenue - fuel_cost
+    net_revenue = revenue_after_fuel - results["fixed_cost"].to_numpy()
+    net_revenue = net_revenue - results["variable_cost"].to_numpy()
+
+    results["CSS"] = power_price - fuel_price
+    results["fuel_cost"] = fuel_cost
+    results["gross_revenue"] = gross_revenue
+    results["revenue_after_fuel"] = revenue_after_fuel
+    results["net_revenue"] = net_revenue
+    results["cumulative_gross"] = np.cumsum(gross_revenue)
+    results["cumulative_after_fuel"] = np.cumsum(revenue_after_fuel)
+    results["cumulative_net"] = np.cumsum(net_revenue)
+    results.attrs["step_hours"] = graph.step_hours
+
+    return results
+
+
+def dispatch_kpis(results: pd.DataFrame) -> dict:
+    # Headline figures of a dispatch_results table
+    step_hours = results.attrs.get("step_hours", 1.0)
+    net_revenue = results["cumulative_net"].iloc[-1]
+    production = results["energy"].sum()
+
+    return {
+        "net_revenue": net_revenue,
+        "production": production,
+        "revenue_per_MWh": net_revenue / production if production else np.nan,
+        "hours_on": (results["load"].to_numpy() > 0).sum() * step_hours,
+        "starts": int(results["start"].sum()),
+        "initial_state": results["Path"].iloc[0],
+        "final_state": results["Path"].iloc[-1],
+    }
+
+
+def aggregate_results(results: pd.DataFrame, freq="D") -> pd.DataFrame:
+    """
+    Sum a dispatch_results table by day ("D"), week ("W") or month ("M").
+    Tables of several scenarios concatenated with a "scenario" column are
+    summarized per scenario and period.
+    """
+
+    step_hours = results.attrs.get("step_hours", 1.0)
+    keys = [results["Datetime"].dt.to_period(freq).rename("period")]
+    if "scenario" in results:
+        keys.insert(0, results["scenario"])
+
+    summary = (
+        results.assign(hours_on=(results["load"] > 0) * step_hours)
+        .groupby(keys, observed=True, sort=True)
+        .agg(
+            gross_revenue=("gross_revenue", "sum"),
+            revenue_after_fuel=("revenue_after_fuel", "sum"),
+            net_revenue=("net_revenue", "sum"),
+            production=("energy", "sum"),
+            hours_on=("hours_on", "sum"),
+            starts=("start", "sum"),
+            power_price=("power_price", "mean"),
+            CSS=("CSS", "mean"),
+        )
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        summary["revenue_per_MWh"] = summary["net_revenue"] / summary["production"]
+
+    return summary
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+from utils.optimization import (
+    action_segments,
+    backward_step,
+    compute_profit_matrix,
+    path_kpis,
+    price_arrays,
+)
+from utils.state_graph import as_state_graph
+
+
+def rolling_horizon_dispatch(
+    transition_df,
+    prices_df: pd.DataFrame,
+    start_state: str,
+    horizon_hours=168,
+    commit_hours=24,
+    ef=0.18,
+) -> tuple:
+    """
+    Receding-horizon simulation: every commit_hours the plant is optimized
+    over the next horizon_hours, the first commit_hours of that plan are
+    committed and the committed end state (OFF_i / RAMP_*-i counters
+    included) is the start state of the next window. Both durations are in
+    hours and converted to steps of the plant model.
+
+    The backward pass does not depend on the start state, so all windows are
+    solved together: the hour x state profit matrix is computed once for the
+    whole period and one vectorized backward sweep over the horizon solves
+    every window at once (windows running past the end of the data see zero
+    profit there, which is the same as their V = 0 terminal condition). Only
+    the forward pass, which carries the state from window to window, is
+    sequential.
+
+    Returns (schedule, kpis): prices_df with the committed Path, load, hourly
+    net revenue and the window that committed each hour, and the KPI row of
+    the committed schedule.
+    """
+
+    graph = as_state_graph(transition_df)
+    window = prices_df.shape[0]
+    horizon = int(round(horizon_hours / graph.step_hours))
+    commit = int(round(commit_hours / graph.step_hours))
+    power_price, gas_price, co2_price = price_arrays(prices_df, window)
+    profit = compute_profit_matrix(graph, power_price, gas_price, co2_price, ef)
+
+    # Window k covers steps starts[k] .. starts[k] + horizon - 1
+    starts = np.arange(0, window, commit)
+    hours = starts[:, None] + np.arange(horizon)
+    inside = hours < window
+    hours = np.minimum(hours, window - 1)
+
+    values = np.zeros((len(starts), graph.n_states))
+    actions = np.empty((horizon, len(starts), graph.n_states), dtype=np.int8)
+    segments = action_segments(graph)
+    for h in reversed(range(horizon)):
+        window_profit = np.where(inside[:, h, None], profit[hours[:, h]], 0.0)
+        values, actions[h] = backward_step(
+            window_profit, values, graph.successors, segments
+        )
+
+    # Forward pass: commit the first hours of each plan, carry the end state
+    states = np.empty(window, dtype=np.int64)
+    committed_by = np.empty(window, dtype=np.int64)
+    state = graph.index_of(start_state)
+    for k, start in enumerate(starts):
+        for h in range(min(commit, window - start)):
+            states[start + h] = state
+            committed_by[start + h] = k
+            action = actions[h, k, state]
+            if action < 0:
+                raise ValueError(
+                    f"No feasible transition from state {graph.labels[state]} "
+                    f"at hour {start + h}"
+                )
+            state = graph.successors[state, action]
+
+    hourly_net = profit[np.arange(window), states]
+
+    schedule = prices_df.copy()
+    schedule["Path"] = graph.labels[states]
+    schedule["load"] = graph.load[states]
+    schedule["net_revenue"] = hourly_net
+    schedule["window"] = committed_by
+
+    return schedule, path_kpis(graph, states, hourly_net.sum())
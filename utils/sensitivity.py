@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+from utils.optimization import (
+    compute_profit_matrix,
+    extract_path,
+    price_arrays,
+    solve_bellman,
+)
+from utils.state_graph import as_state_graph
+
+
+def forward_values(graph, profit, start):
+    """
+    forward[t, s]: best profit of hours 0 .. t - 1 over the paths from the
+    start state that are in state s at hour t (-inf if s is not reachable).
+    """
+
+    window = profit.shape[0]
+    known = graph.successors >= 0
+    sources = np.nonzero(known)[0]
+    targets = graph.successors[known]
+
+    forward = np.full((window, graph.n_states), -np.inf)
+    forward[0, start] = 0.0
+    for t in range(window - 1):
+        np.maximum.at(forward[t + 1], targets, forward[t, sources] + profit[t, sources])
+
+    return forward
+
+
+def price_sensitivities(
+    transition_df, prices_df: pd.DataFrame, start_state: str, ef=0.18, bump=1.0
+) -> pd.DataFrame:
+    """
+    Marginal value of the power, gas and CO2 price of every hour: by the
+    envelope theorem, the load, -gas and -gas x ef of the optimal path.
+
+    A price of hour t only moves the profit of hour t, so every path through
+    state s at hour t moves by the same amount. With the best value of the
+    paths through each (hour, state), forward + backward values, the optimum
+    after a +/- bump of any single hourly price is exact without re-solving.
+    Hours where a bump makes a path through another state optimal (the
+    derivative is one-sided there) are flagged as kinks.
+
+    Returns one row per hour with the optimal Path and, for each of power,
+    gas and co2: the derivative (EUR per EUR/MWh or EUR/t), the change in
+    optimal net revenue for a +bump / -bump of that price, and the kink flag.
+    """
+
+    graph = as_state_graph(transition_df)
+    window = prices_df.shape[0]
+    power_price, gas_price, co2_price = price_arrays(prices_df, window)
+    profit = compute_profit_matrix(graph, power_price, gas_price, co2_price, ef)
+    start = graph.index_of(start_state)
+
+    values, actions = solve_bellman(graph, power_price, gas_price, co2_price, ef)
+    states, _, _ = extract_path(graph, values, actions, start)
+
+    # Best value of the paths in state s at hour t, optimum on the path
+    through = forward_values(graph, profit, start) + values[:window]
+    hours = np.arange(window)
+    optimum = through[hours, states]
+    tolerance = 1e-9 * max(1.0, abs(values[0, start]))
+
+    # d profit / d price per (hour, state), 0.0 - x keeps OFF states at +0.0
+    hourly_ef = np.broadcast_to(np.asarray(ef, dtype=float), (window,))
+    coefficients = {
+        "power": np.broadcast_to(graph.energy, (window, graph.n_states)),
+        "gas": np.broadcast_to(0.0 - graph.gas, (window, graph.n_states)),
+        "co2": 0.0 - np.multiply.outer(hourly_ef, graph.gas),
+    }
+
+    sensitivities = pd.DataFrame(index=prices_df.index[:window])
+    sensitivities["Path"] = graph.labels[states]
+    for name, coefficient in coefficients.items():
+        derivative = coefficient[hours, states]
+        up = (through + bump * coefficient).max(axis=1) - optimum
+        down = (through - bump * coefficient).max(axis=1) - optimum
+
+        sensitivities[name] = derivative
+        sensitivities[f"{name}_up"] = up
+        sensitivities[f"{name}_down"] = down
+        sensitivities[f"{name}_kink"] = (up - bump * derivative > tolerance) | (
+            down + bump * derivative > tolerance
+        )
+
+    return sensitivities
@@ -0,0 +1,186 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+
+def action_columns(n_actions: int) -> list:
+    # off, then one action per load level: minload, load_2, ..., fullload
+    levels = [f"load_{k}" for k in range(2, n_actions - 1)]
+    return ["off", "minload", *levels, "fullload"]
+
+
+ACTION_COLUMNS = action_columns(3)
+
+
+@dataclass
+class StateGraph:
+    """
+    Integer-encoded plant model. State i is labels[i]; successors[i, a] is the
+    index of the state reached with action a (off, then one action per load
+    level, see action_columns), or -1 if the label is unknown. A state with
+    fewer distinct moves repeats them, e.g. a ramp hour has the same successor
+    under every action. successor_labels optionally keeps the successor names
+    as written, unknown ones included, for the transition matrix view.
+
+    Each step lasts step_hours: load is a power (MW) while gas, fixed_cost and
+    variable_cost are the amounts of one step.
+    """
+
+    labels: np.ndarray
+    load: np.ndarray
+    efficiency: np.ndarray
+    fixed_cost: np.ndarray
+    variable_cost: np.ndarray
+    gas: np.ndarray
+    successors: np.ndarray
+    step_hours: float = 1.0
+    successor_labels: np.ndarray = None
+    _segments: list = field(default=None, init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_transition_df(cls, transition_df: pd.DataFrame) -> "StateGraph":
+        labels = transition_df.index.to_numpy(dtype=object)
+        index = {label: i for i, label in enumerate(labels)}
+
+        columns = [
+            column
+            for column in transition_df.columns
+            if column in ACTION_COLUMNS or column.startswith("load_")
+        ]
+        successor_labels = transition_df[columns].to_numpy(dtype=object)
+        successors = np.array(
+            [[index.get(label, -1) for label in row] for row in successor_labels],
+            dtype=np.int64,
+        ).reshape(len(labels), len(columns))
+
+        return cls(
+            labels=labels,
+            load=transition_df["load"].to_numpy(dtype=float),
+            efficiency=transition_df["efficiency"].to_numpy(dtype=float),
+            fixed_cost=transition_df["fixed_cost"].to_numpy(dtype=float),
+            variable_cost=transition_df["variable_cost"].to_numpy(dtype=float),
+            gas=transition_df["gas"].to_numpy(dtype=float),
+            successors=successors,
+            step_hours=transition_df.attrs.get("step_hours", 1.0),
+            successor_labels=successor_labels,
+        )
+
+    def to_dataframe(self) -> pd.DataFrame:
+        # Transition matrix in the create_list_states layout
+        if self.successor_labels is None:
+            next_labels = np.append(self.labels, None)[self.successors]
+        else:
+            next_labels = self.successor_labels
+
+        df_status = pd.DataFrame(
+            {
+                "load": self.load,
+                "efficiency": self.efficiency,
+                "fixed_cost": self.fixed_cost,
+                "variable_cost": self.variable_cost,
+                **dict(zip(action_columns(self.successors.shape[1]), next_labels.T)),
+                "gas": self.gas,
+            },
+            index=pd.Index(self.labels, name="status"),
+        )
+        df_status.attrs["step_hours"] = self.step_hours
+
+        return df_status
+
+    def action_segments(self) -> list:
+        """
+        States grouped by how many leading actions reach all their distinct
+        successors (1 for a ramp hour, K + 1 for a running state with K load
+        levels): one (rows, targets) pair per group, targets being the rows x
+        d successor table of the group. The backward step takes one max per
+        group, so its work follows the number of distinct transitions and its
+        number of array operations does not grow with the load levels.
+        """
+
+        if self._segments is None:
+            successors = self.successors
+            new = np.ones(successors.shape, dtype=bool)
+            for action in range(1, successors.shape[1]):
+                new[:, action] = (successors[:, action] >= 0) & (
+                    successors[:, :action] != successors[:, action, None]
+                ).all(axis=1)
+            needed = successors.shape[1] - np.argmax(new[:, ::-1], axis=1)
+
+            self._segments = []
+            for n_actions in np.unique(needed):
+                rows = np.flatnonzero(needed == n_actions)
+                self._segments.append((rows, successors[rows, :n_actions]))
+
+        return self._segments
+
+    def successor_csr(self) -> tuple:
+        """
+        Distinct known successors of each state in CSR form: the successors
+        of state i are indices[indptr[i]:indptr[i + 1]], sorted.
+        """
+
+        ordered = np.sort(self.successors, axis=1)
+        keep = ordered >= 0
+        keep[:, 1:] &= ordered[:, 1:] != ordered[:, :-1]
+        indptr = np.zeros(self.n_states + 1, dtype=np.int64)
+        np.cumsum(keep.sum(axis=1), out=indptr[1:])
+
+        return indptr, ordered[keep]
+
+    @property
+    def n_states(self) -> int:
+        return len(self.labels)
+
+    @property
+    def energy(self) -> np.ndarray:
+        # MWh produced per step in each state
+        return self.load * self.step_hours
+
+    @property
+    def start_mask(self) -> np.ndarray:
+        # First step of a HOT / WARM / COLD ramp, i.e. a plant start
+        return np.array(
+            [
+                label.startswith("RAMP_") and label.endswith("-1")
+                for label in self.labels
+            ],
+            dtype=bool,
+        )
+
+    def index_of(self, label: str) -> int:
+        matches = np.flatnonzero(self.labels == label)
+        if matches.size == 0:
+            raise KeyError(f"Unknown state '{label}'")
+        return int(matches[0])
+
+
+def as_state_graph(transition) -> StateGraph:
+    if isinstance(transition, StateGraph):
+        return transition
+    return StateGraph.from_transition_df(transition)
+
+
+def reachable_masks(graph: StateGraph, start: int, window: int) -> list:
+    """
+    Forward reachability from the start state: masks[t][i] is True if state i
+    can be occupied at hour t. The list stops growing once the reachable set
+    reaches a fixed point, later hours reuse masks[-1].
+    """
+
+    indptr, successors = graph.successor_csr()
+    sources = np.repeat(np.arange(graph.n_states), np.diff(indptr))
+
+    mask = np.zeros(graph.n_states, dtype=bool)
+    mask[start] = True
+    masks = [mask]
+
+    for _ in range(window):
+        following = np.zeros(graph.n_states, dtype=bool)
+        following[successors[mask[sources]]] = True
+        if np.array_equal(following, mask):
+            break
+        mask = following
+        masks.append(mask)
+
+    return masks
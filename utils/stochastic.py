@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+from utils.optimization import (
+    action_segments,
+    backward_step,
+    compute_profit_matrix,
+)
+from utils.state_graph import as_state_graph
+
+
+def estimate_price_regimes(prices_df: pd.DataFrame, n_regimes=10) -> tuple:
+    """
+    Discretize the historical prices into a Markov chain of price regimes.
+    Hours are binned on power price quantiles; each regime is represented by
+    the mean power, gas and CO2 prices of its hours and the transition matrix
+    is estimated from consecutive hours.
+
+    Tied prices can leave quantile bins empty (e.g. many hours at 0 €/MWh):
+    only the bins with hours are kept, so there may be fewer than n_regimes.
+
+    Returns (regime_prices, transition_matrix, regimes): a regime x
+    (power, gas, co2) array, the regime x regime row-stochastic matrix and the
+    regime of every hour of prices_df.
+    """
+
+    power_price = prices_df["power_price"].to_numpy(dtype=float)
+    edges = np.quantile(power_price, np.linspace(0, 1, n_regimes + 1)[1:-1])
+    bins = np.searchsorted(np.unique(edges), power_price, side="right")
+    _, regimes = np.unique(bins, return_inverse=True)
+    n_regimes = regimes.max() + 1
+
+    columns = ["power_price", "gas_price", "co2_price"]
+    regime_prices = prices_df[columns].groupby(regimes).mean().to_numpy(dtype=float)
+    if np.isnan(regime_prices).any():
+        raise ValueError("Missing prices: a price regime has no average price")
+
+    counts = np.zeros((n_regimes, n_regimes))
+    np.add.at(counts, (regimes[:-1], regimes[1:]), 1)
+    # Regimes never left in the history stay where they are
+    counts[counts.sum(axis=1) == 0] = np.eye(n_regimes)[counts.sum(axis=1) == 0]
+    transition_matrix = counts / counts.sum(axis=1, keepdims=True)
+
+    return regime_prices, transition_matrix, regimes
+
+
+def stochastic_bellman_optimization(
+    transition_df, regime_prices, transition_matrix, window, ef=0.18
+):
+    """
+    Expected-value Bellman recursion over (price regime, plant state). The
+    regime of the current hour is observed before deciding, the next one
+    follows the Markov chain:
+
+        V[t, r, s] = profit(r, s) + max_a sum_r' P[r, r'] V[t + 1, r', succ(s, a)]
+
+    The expectation is one regime x regime by regime x state matrix product
+    per hour. Returns values ((window + 1) x regime x state) and the int8
+    policy (window x regime x state).
+    """
+
+    graph = as_state_graph(transition_df)
+    regime_prices = np.asarray(regime_prices, dtype=float)
+    profit = compute_profit_matrix(graph, *regime_prices.T, ef)
+
+    n_regimes = regime_prices.shape[0]
+    values = np.zeros((window + 1, n_regimes, graph.n_states))
+    actions = np.empty((window, n_regimes, graph.n_states), dtype=np.int8)
+
+    segments = action_segments(graph)
+    for t in reversed(range(window)):
+        expected = transition_matrix @ values[t + 1]
+        values[t], actions[t] = backward_step(
+            profit, expected, graph.successors, segments
+        )
+
+    return values, actions
+
+
+def simulate_regime_policy(transition_df, actions, start_state, regimes):
+    # Apply the stochastic policy along one realized sequence of regimes
+    graph = as_state_graph(transition_df)
+    state = graph.index_of(start_state)
+    states = np.empty(len(regimes), dtype=np.int64)
+
+    for t, regime in enumerate(regimes):
+        states[t] = state
+        action = actions[t, regime, state]
+        if action < 0:
+            raise ValueError(
+                f"No feasible transition from state {graph.labels[state]} at hour {t}"
+            )
+        state = graph.successors[state, action]
+
+    return states
@@ -0,0 +1,165 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from utils.dataframes import (
+    build_constraints_df,
+    build_efficiency_df,
+    build_power_df,
+    build_state_df,
+)
+from utils.daily_starts import solve_daily_starts
+from utils.minimize import solve_minimized
+from utils.optimization import path_kpis, price_arrays
+from utils.transition import build_state_graph, list_state_specs, topology_key
+from utils.validation import check_state_graph
+
+# Price arrays and timestamps of the period, set once per worker process by
+# _init_worker
+_worker_prices = None
+_worker_datetimes = None
+
+
+def sweep_grid(ranges: dict) -> list:
+    """
+    Cartesian product of parameter ranges, e.g.
+    {"startup_cost": [1500, 2500], "min_hours_on": [2, 4]} -> 4 points.
+    """
+
+    keys = list(ranges)
+    return [dict(zip(keys, values)) for values in itertools.product(*ranges.values())]
+
+
+def build_plant_tables(defaults: dict, params: dict) -> tuple:
+    return (
+        build_state_df(defaults, params),
+        build_constraints_df(defaults, params),
+        build_power_df(defaults, params),
+        build_efficiency_df(defaults, params),
+    )
+
+
+def solve_plant(
+    graph,
+    power_price,
+    gas_price,
+    co2_price,
+    start_state,
+    ef=0.18,
+    max_starts_per_day=None,
+    datetimes=None,
+):
+    """
+    Optimal path (state indices) and net revenue of one plant over the
+    prices. With max_starts_per_day, the starts of each calendar day of
+    datetimes are limited (see solve_daily_starts).
+    """
+
+    if max_starts_per_day is None:
+        return solve_minimized(
+            graph, power_price, gas_price, co2_price, start_state, ef
+        )
+
+    states, _, net_revenue = solve_daily_starts(
+        graph,
+        power_price,
+        gas_price,
+        co2_price,
+        datetimes,
+        start_state,
+        max_starts_per_day,
+        ef,
+    )
+    return states, net_revenue
+
+
+def daily_start_limit(constraints_df: pd.DataFrame) -> float:
+    # Max Nb Starts A day of a plant, the limit passed to solve_plant
+    return constraints_df.loc["Max Nb Starts A day", "Use"]
+
+
+def _init_worker(power_price, gas_price, co2_price, datetimes):
+    global _worker_prices, _worker_datetimes
+    _worker_prices = (power_price, gas_price, co2_price)
+    _worker_datetimes = datetimes
+
+
+def _solve_point(graph, start_state, ef, max_starts):
+    try:
+        states, net_revenue = solve_plant(
+            graph, *_worker_prices, start_state, ef, max_starts, _worker_datetimes
+        )
+    except (KeyError, ValueError) as error:
+        return {"status": str(error.args[0])}
+
+    kpis = path_kpis(graph, states, net_revenue).iloc[0].to_dict()
+    kpis["status"] = "ok"
+    return kpis
+
+
+def run_sweep(
+    defaults: dict,
+    base_params: dict,
+    ranges: dict,
+    prices_df: pd.DataFrame,
+    start_state: str,
+    max_workers=None,
+) -> pd.DataFrame:
+    """
+    Solve the plant for every point of the grid spanned by ranges (keys of the
+    defaults dict) on top of base_params. Returns one row per grid point with
+    the swept values and the KPIs of the optimal dispatch.
+    """
+
+    power_price, gas_price, co2_price = price_arrays(prices_df, prices_df.shape[0])
+    datetimes = prices_df["Datetime"].to_numpy()
+    points = sweep_grid(ranges)
+
+    # The state topology only depends on the ramp table and min on / off hours:
+    # it is built once per distinct topology, the attributes once per point
+    specs_by_topology = {}
+    graphs, efs, max_starts, results = [], [], [], []
+    for point in points:
+        params = {**base_params, **point}
+
+        # Points with a broken plant model are reported without being solved
+        try:
+            state_df, constraints_df, power_df, efficiency_df = build_plant_tables(
+                defaults, params
+            )
+            key = topology_key(state_df, constraints_df)
+            if key not in specs_by_topology:
+                specs_by_topology[key] = list_state_specs(state_df, constraints_df)
+            graph = check_state_graph(
+                build_state_graph(
+                    specs_by_topology[key], constraints_df, power_df, efficiency_df
+                )
+            )
+            limit, result = daily_start_limit(constraints_df), None
+        except (KeyError, ValueError) as error:
+            graph, limit, result = None, None, {"status": str(error.args[0])}
+
+        graphs.append(graph)
+        results.append(result)
+        efs.append(params.get("emission_factor", defaults["emission_factor"]))
+        max_starts.append(limit)
+
+    valid = [i for i, result in enumerate(results) if result is None]
+
+    # Prices are shipped once per worker, only the graphs travel with each task
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(power_price, gas_price, co2_price, datetimes),
+    ) as pool:
+        solved = pool.map(
+            _solve_point,
+            [graphs[i] for i in valid],
+            [start_state] * len(valid),
+            [efs[i] for i in valid],
+            [max_starts[i] for i in valid],
+        )
+        for i, result in zip(valid, solved):
+            results[i] = result
+
+    return pd.concat([pd.DataFrame(points), pd.DataFrame(results)], axis=1)
@@ -1,44 +1,45 @@
-import pandas as pd
+import numpy as np
+from utils.state_graph import StateGraph
 
 
-def compute_state_values(
-    state, hour, constraints_df, power_df, efficiency_df, startup=False
-):
+def list_state_specs(state_df, constraints_df, steps_per_hour=1):
+    """
+    Topology of the state graph: one (label, source, hour, startup, off,
+    minload, load_2, ..., fullload) tuple per state, with one action per load
+    level (the LOAD_k rows of state_df between MIN_LOAD and FULL_LOAD).
+    source / hour point to the row and "Hour k" column of the power and
+    efficiency tables (None for OFF states). Only the ramp table and the min
+    on / off hours are needed, so the specs can be shared by plants that only
+    differ in costs, power or efficiency.
 
-    load = power_df.loc[state, f"Hour {hour}"]
-    efficiency = efficiency_df.loc[state, f"Hour {hour}"] / 100
-    startup_cost = constraints_df.loc["Startup Cost", "Use"] if startup else 0
-    fixed_cost = startup_cost + constraints_df.loc["Hourly fixed cost", "Use"]
-    variable_cost = load * constraints_df.loc["Variable Cost", "Use"]
-    gas = load / efficiency if efficiency != 0 else 0
+    With steps_per_hour > 1 the durations of the plant tables (ramps, min on /
+    off hours, off-hours limits and the STOP hour) are counted in steps, so
+    the RAMP_*-i, FULL_LOAD-i and OFF_i counters are step counters.
+    """
 
-    return load, efficiency, fixed_cost, variable_cost, gas
+    # Keyed by label: a label written twice (e.g. FULL_LOAD-4 reached from
+    # several ramps) keeps its first position and its last spec
+    specs = {}
 
+    # 3 transitions possibles
 
-def create_list_states(state_df, constraints_df, power_df, efficiency_df):
+    min_hours_on = int(constraints_df.loc["Min hours on", "Use"]) * steps_per_hour
 
-    columns = [
-        "load",
-        "efficiency",
-        "fixed_cost",
-        "variable_cost",
-        "off",
-        "minload",
-        "fullload",
-        "gas",
+    # Running load levels from partial to full load, one action each after off
+    levels = [
+        "MIN_LOAD",
+        *[state for state in state_df.index if state.startswith("LOAD_")],
+        "FULL_LOAD",
     ]
-    df_status = pd.DataFrame(columns=columns)
-    df_status.index.name = "status"
-
-    # 3 transitions possibles
-
-    min_hours_on = int(constraints_df.loc["Min hours on", "Use"])
+    n_actions = len(levels) + 1
 
     for state in state_df.index:
 
         # on commence pour les pentes
         if state.startswith("RAMP"):
-            ramp_to_full = state_df.loc[state, "Hours to Reach Full Load"]
+            ramp_to_full = (
+                state_df.loc[state, "Hours to Reach Full Load"] * steps_per_hour
+            )
             for i in range(1, min_hours_on + 1):
                 if i < ramp_to_full:
                     next_state = f"{state}-{i+1}"
@@ -63,58 +64,37 @@ def create_list_states(state_df, constraints_df, power_df, efficiency_df):
                     label = f"FULL_LOAD-{i}"
                     startup = False
 
-                load, eff, fixed, var_cost, gas = compute_state_values(
+                specs[label] = (
+                    label,
                     "FULL_LOAD" if i > ramp_to_full else state,
-                    1 if i > ramp_to_full else i,
-                    constraints_df,
-                    power_df,
-                    efficiency_df,
-                    startup=startup,
+                    1 if i > ramp_to_full else (i - 1) // steps_per_hour + 1,
+                    startup,
+                    *[next_state] * n_actions,
                 )
 
-                df_status.loc[label] = [
-                    load,
-                    eff,
-                    fixed,
-                    var_cost,
-                    next_state,
-                    next_state,
-                    next_state,
-                    gas,
-                ]
-
-        elif state in ["FULL_LOAD", "MIN_LOAD", "STOP"]:
-
-            load, eff, fixed, var_cost, gas = compute_state_values(
-                state, 1, constraints_df, power_df, efficiency_df, startup=False
-            )
+        elif state in levels or state == "STOP":
+
+            # A running plant stops or moves to any load level
+            if state == "STOP":
+                next_states = ["OFF_1"] * n_actions
+            else:
+                next_states = ["STOP", *levels]
+
+            specs[state] = (state, state, 1, False, *next_states)
 
-            next_states = {
-                "FULL_LOAD": ("STOP", "MIN_LOAD", "FULL_LOAD"),
-                "MIN_LOAD": ("STOP", "MIN_LOAD", "FULL_LOAD"),
-                "STOP": ("OFF_1", "OFF_1", "OFF_1"),
-            }
-
-            off, minload, fullload = next_states[state]
-            df_status.loc[state] = [
-                load,
-                eff,
-                fixed,
-                var_cost,
-                off,
-                minload,
-                fullload,
-                gas,
-            ]
-
-    range_off = state_df["Use < XX off hours"].nlargest(2).iloc[-1]
-    hot_limit = state_df["Use < XX off hours"].nlargest(3).iloc[-1]
-    min_hours_off = int(constraints_df.loc["Min hours off", "Use"])
+            # The STOP hour lasts steps_per_hour steps: STOP, STOP-2, ...
+            if state == "STOP" and steps_per_hour > 1:
+                chain = ["STOP"] + [f"STOP-{k}" for k in range(2, steps_per_hour + 1)]
+                for label, next_state in zip(chain, chain[1:] + ["OFF_1"]):
+                    specs[label] = (label, state, 1, False, *[next_state] * n_actions)
+
+    range_off = state_df["Use < XX off hours"].nlargest(2).iloc[-1] * steps_per_hour
+    hot_limit = state_df["Use < XX off hours"].nlargest(3).iloc[-1] * steps_per_hour
+    min_hours_off = int(constraints_df.loc["Min hours off", "Use"]) * steps_per_hour
 
     for i in range(1, range_off + 1):
 
         status = f"OFF_{i}"
-        load = eff = fixed = var_cost = gas = 0
 
         if i < min_hours_off:
             target = f"OFF_{i+1}"
@@ -129,18 +109,89 @@ def create_list_states(state_df, constraints_df, power_df, efficiency_df):
             target = f"OFF_{i+1}"
             fullload = "RAMP_W-1"
 
-        df_status.loc[status] = [
-            load,
-            eff,
-            fixed,
-            var_cost,
-            target,
-            target,
-            fullload,
-            gas,
-        ]
+        specs[status] = (status, None, 0, False, *[target] * (n_actions - 1), fullload)
 
     # Static OFF state
-    df_status.loc["OFF"] = [0, 0, 0, 0, "OFF", "OFF", "RAMP_C-1", 0]
-
-    return df_status
+    specs["OFF"] = ("OFF", None, 0, False, *["OFF"] * (n_actions - 1), "RAMP_C-1")
+
+    return list(specs.values())
+
+
+def topology_key(state_df, constraints_df, steps_per_hour=1):
+    # Everything list_state_specs reads, in a hashable form
+    return (
+        tuple(state_df["Use < XX off hours"].items()),
+        tuple(state_df["Hours to Reach Full Load"].items()),
+        int(constraints_df.loc["Min hours on", "Use"]),
+        int(constraints_df.loc["Min hours off", "Use"]),
+        steps_per_hour,
+    )
+
+
+def build_state_graph(specs, constraints_df, power_df, efficiency_df, steps_per_hour=1):
+    """
+    StateGraph for a list of specs, with the per-state attributes looked up
+    from the plant tables in one vectorized pass. steps_per_hour must match
+    the one the specs were listed with. Raises a KeyError naming the row or
+    "Hour k" column of the tables a running state has no value in.
+    """
+
+    step_hours = 1 / steps_per_hour
+
+    labels = np.array([spec[0] for spec in specs], dtype=object)
+    index = {label: i for i, label in enumerate(labels)}
+    successors = np.array(
+        [[index.get(label, -1) for label in spec[4:]] for spec in specs],
+        dtype=np.int64,
+    ).reshape(len(specs), len(specs[0]) - 4)
+
+    is_on = np.array([spec[1] is not None for spec in specs])
+    rows = power_df.index.get_indexer([spec[1] or "STOP" for spec in specs])
+    columns = power_df.columns.get_indexer(
+        [f"Hour {max(spec[2], 1)}" for spec in specs]
+    )
+    startup = np.array([spec[3] for spec in specs])
+
+    # A missing row or column would index the last one of the tables
+    missing = np.flatnonzero(is_on & ((rows < 0) | (columns < 0)))
+    if missing.size:
+        state, row, hour = specs[missing[0]][:3]
+        name = row if rows[missing[0]] < 0 else f"Hour {max(hour, 1)}"
+        raise KeyError(f"No {name} in the power and efficiency tables for {state}")
+
+    load = np.where(is_on, power_df.to_numpy(dtype=float)[rows, columns], 0.0)
+    efficiency = np.where(
+        is_on, efficiency_df.to_numpy(dtype=float)[rows, columns] / 100, 0.0
+    )
+    startup_cost = np.where(startup, constraints_df.loc["Startup Cost", "Use"], 0)
+    fixed_cost = np.where(
+        is_on,
+        startup_cost + constraints_df.loc["Hourly fixed cost", "Use"] * step_hours,
+        0.0,
+    )
+    variable_cost = load * constraints_df.loc["Variable Cost", "Use"] * step_hours
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gas = np.where(efficiency != 0, load / efficiency * step_hours, 0.0)
+
+    return StateGraph(
+        labels=labels,
+        load=load,
+        efficiency=efficiency,
+        fixed_cost=fixed_cost,
+        variable_cost=variable_cost,
+        gas=gas,
+        successors=successors,
+        step_hours=step_hours,
+        successor_labels=np.array([spec[4:] for spec in specs], dtype=object),
+    )
+
+
+def create_list_states(
+    state_df, constraints_df, power_df, efficiency_df, steps_per_hour=1
+):
+    # Transition matrix DataFrame of the plant, see StateGraph.to_dataframe
+    specs = list_state_specs(state_df, constraints_df, steps_per_hour)
+    graph = build_state_graph(
+        specs, constraints_df, power_df, efficiency_df, steps_per_hour
+    )
+    return graph.to_dataframe()
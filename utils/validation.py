@@ -0,0 +1,148 @@
+import re
+from collections import deque
+
+import numpy as np
+
+# Counted chains of states: steps since the start (ramp hours, then
+# FULL_LOAD-k until the min hours on), steps off, steps of the STOP hour
+COUNTERS = {
+    "on": re.compile(r"(?:RAMP_[A-Z]+|FULL_LOAD)-(\d+)"),
+    "off": re.compile(r"OFF_(\d+)"),
+    "stop": re.compile(r"STOP(?:-(\d+))?"),
+}
+
+ISSUES = {
+    "dangling": "Dangling successors",
+    "unreachable": "Unreachable states",
+    "traps": "No start reachable from",
+    "counters": "Inconsistent counters",
+}
+
+# Number of labels listed in an issue before they are summarized
+MAX_LISTED = 10
+
+
+def parse_counter(label: str):
+    # (chain, counter) of a counted state, None for the other states
+    for chain, pattern in COUNTERS.items():
+        match = pattern.fullmatch(label)
+        if match:
+            return chain, int(match.group(1) or 1)
+    return None
+
+
+def _listed(labels) -> str:
+    labels = list(labels)
+    listed = ", ".join(labels[:MAX_LISTED])
+    if len(labels) > MAX_LISTED:
+        listed += f" (+{len(labels) - MAX_LISTED} more)"
+    return listed
+
+
+def _search(indptr, indices, roots, n_states) -> np.ndarray:
+    # Breadth-first search over a CSR adjacency, True for the states found
+    found = np.zeros(n_states, dtype=bool)
+    found[roots] = True
+    queue = deque(roots)
+
+    while queue:
+        state = queue.popleft()
+        for following in indices[indptr[state] : indptr[state + 1]]:
+            if not found[following]:
+                found[following] = True
+                queue.append(following)
+
+    return found
+
+
+def validate_state_graph(graph, start_state="OFF") -> dict:
+    """
+    Structural checks of a built state graph, in O(states + transitions):
+
+    - dangling: successor labels that are not states of the graph;
+    - unreachable: states no path from start_state leads to;
+    - traps: states from which the plant can never start again (no path to
+      the first hour of a ramp), dead ends included;
+    - counters: transitions inside a counted chain (RAMP_X-k / FULL_LOAD-k,
+      OFF_k, STOP-k) that do not add one step, or entering a chain elsewhere
+      than at its first step.
+
+    Returns the issues found by kind ("state -> successor" or state labels),
+    kinds without issues are left out.
+    """
+
+    issues = {}
+    labels = graph.labels
+    successors = graph.successors
+
+    # Dangling successors, named as written when the labels are kept
+    missing = np.argwhere(successors < 0)
+    if missing.size:
+        names = (
+            graph.successor_labels
+            if graph.successor_labels is not None
+            else np.full(successors.shape, "?", dtype=object)
+        )
+        issues["dangling"] = list(
+            dict.fromkeys(
+                f"{labels[state]} -> {names[state, action]}"
+                for state, action in missing
+            )
+        )
+
+    indptr, indices = graph.successor_csr()
+    sources = np.repeat(np.arange(graph.n_states), np.diff(indptr))
+
+    # Forward search from the start state
+    start = graph.index_of(start_state)
+    reachable = _search(indptr, indices, [start], graph.n_states)
+    if not reachable.all():
+        issues["unreachable"] = list(labels[~reachable])
+
+    # Backward search from the plant starts over the reversed transitions
+    order = np.argsort(indices, kind="stable")
+    reverse_indptr = np.zeros(graph.n_states + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=graph.n_states), out=reverse_indptr[1:])
+    can_start = _search(
+        reverse_indptr,
+        sources[order],
+        list(np.flatnonzero(graph.start_mask)),
+        graph.n_states,
+    )
+    if not can_start.all():
+        issues["traps"] = list(labels[~can_start])
+
+    # Counters only move one step at a time
+    counters = [parse_counter(label) for label in labels]
+    inconsistent = []
+    for state, following in zip(sources, indices):
+        if counters[following] is None:
+            continue
+        chain, counter = counters[following]
+        origin = counters[state]
+        expected = origin[1] + 1 if origin and origin[0] == chain else 1
+        if counter != expected:
+            inconsistent.append(f"{labels[state]} -> {labels[following]}")
+    if inconsistent:
+        issues["counters"] = inconsistent
+
+    return issues
+
+
+def describe_issues(issues: dict) -> list:
+    # One readable line per kind of issue
+    return [f"{ISSUES[kind]}: {_listed(items)}" for kind, items in issues.items()]
+
+
+def check_state_graph(graph, start_state="OFF"):
+    """
+    Fail fast on a broken plant model, before any solve: raises a ValueError
+    listing the dangling successors, traps and inconsistent counters.
+    Unreachable states only cost a little solve time and are allowed.
+    """
+
+    issues = validate_state_graph(graph, start_state)
+    fatal = {kind: items for kind, items in issues.items() if kind != "unreachable"}
+    if fatal:
+        raise ValueError("Invalid state graph: " + "; ".join(describe_issues(fatal)))
+    return graph